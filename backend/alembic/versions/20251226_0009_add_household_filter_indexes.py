@@ -0,0 +1,31 @@
+"""Add household filter and id_card indexes.
+
+Revision ID: 20251226_0009
+Revises: 20251225_1024
+Create Date: 2025-12-26 09:00:00.000000
+"""
+
+from alembic import op
+
+
+revision = "20251226_0009"
+down_revision = "20251225_1024"
+branch_labels = None
+depends_on = None
+
+GEO_STATUS_INDEX = "ix_households_geo_status"
+ID_CARD_INDEX = "ix_households_id_card"
+
+
+def upgrade() -> None:
+    op.create_index(
+        GEO_STATUS_INDEX,
+        "households",
+        ["province", "district", "commune", "poverty_status"],
+    )
+    op.create_index(ID_CARD_INDEX, "households", ["id_card"])
+
+
+def downgrade() -> None:
+    op.drop_index(ID_CARD_INDEX, table_name="households")
+    op.drop_index(GEO_STATUS_INDEX, table_name="households")
@@ -0,0 +1,47 @@
+"""Add household code counters.
+
+Revision ID: 20251226_0010
+Revises: 20251226_0009
+Create Date: 2025-12-26 09:30:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20251226_0010"
+down_revision = "20251226_0009"
+branch_labels = None
+depends_on = None
+
+HOUSEHOLD_CODE_PREFIX = "HH-"
+HOUSEHOLD_CODE_COUNTER = "household"
+# Only all-digit suffixes count; hand-typed codes like "HH-2024-001" or "HH-ABC"
+# would seed a bogus number or fail the CAST under MySQL strict mode.
+HOUSEHOLD_CODE_PATTERN = "^HH-[0-9]{1,18}$"
+
+
+def upgrade() -> None:
+    counters = op.create_table(
+        "household_code_counters",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("value", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    households = sa.table("households", sa.column("household_code", sa.String()))
+    suffix = sa.func.substr(households.c.household_code, len(HOUSEHOLD_CODE_PREFIX) + 1)
+    current_max = (
+        sa.select(
+            sa.literal(HOUSEHOLD_CODE_COUNTER),
+            sa.func.coalesce(sa.func.max(sa.cast(suffix, sa.Integer)), 0),
+        )
+        .where(
+            households.c.household_code.like(f"{HOUSEHOLD_CODE_PREFIX}%"),
+            households.c.household_code.regexp_match(HOUSEHOLD_CODE_PATTERN),
+        )
+    )
+    op.execute(counters.insert().from_select(["name", "value"], current_max))
+
+
+def downgrade() -> None:
+    op.drop_table("household_code_counters")
@@ -0,0 +1,44 @@
+"""Add background jobs.
+
+Revision ID: 20251226_0011
+Revises: 20251226_0010
+Create Date: 2025-12-26 14:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20251226_0011"
+down_revision = "20251226_0010"
+branch_labels = None
+depends_on = None
+
+JOB_KINDS = ("data_collection_upload", "data_collection_commit")
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.String(length=32), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("kind", sa.Enum(*JOB_KINDS, name="jobkind"), nullable=False),
+        sa.Column("status", sa.Enum(*JOB_STATUSES, name="jobstatus"), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=True),
+        sa.Column("processed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_jobs_user_id", "jobs", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_user_id", table_name="jobs")
+    op.drop_table("jobs")
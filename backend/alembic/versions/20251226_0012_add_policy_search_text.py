@@ -0,0 +1,100 @@
+"""Add folded policy search text with a FULLTEXT index.
+
+Revision ID: 20251226_0012
+Revises: 20251226_0011
+Create Date: 2025-12-26 16:00:00.000000
+"""
+
+import html
+import re
+from typing import Any
+from unicodedata import combining, normalize
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision = "20251226_0012"
+down_revision = "20251226_0011"
+branch_labels = None
+depends_on = None
+
+SEARCH_INDEX = "ix_policies_search_text"
+# Frozen copy of app.utils.text / app.models.policy as of this revision, so the
+# backfill does not change when the app's folding rules do.
+HTML_TAG_PATTERN = re.compile(r"<[^>]+>")
+SEARCH_SEPARATOR_PATTERN = re.compile(r"[\W_]+")
+BLOCK_SKIP_KEYS = {"file", "url", "link", "style", "alignment", "level", "withBorder", "stretched"}
+
+
+def fold_search_text(value: Any) -> str:
+    text = "" if value is None else " ".join(normalize("NFC", str(value)).split())
+    text = normalize("NFD", text.casefold().replace("đ", "d"))
+    text = "".join(char for char in text if not combining(char))
+    return " ".join(SEARCH_SEPARATOR_PATTERN.sub(" ", text).split())
+
+
+def extract_block_text(blocks: Any) -> list[str]:
+    texts: list[str] = []
+
+    def walk(value: Any) -> None:
+        if isinstance(value, str):
+            texts.append(html.unescape(HTML_TAG_PATTERN.sub(" ", value)))
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if key not in BLOCK_SKIP_KEYS:
+                    walk(item)
+
+    if isinstance(blocks, dict):
+        for block in blocks.get("blocks", []):
+            if isinstance(block, dict):
+                walk(block.get("data"))
+    return texts
+
+
+def build_policy_search_text(policy: Any) -> str:
+    parts = [policy.title, policy.summary, policy.description, policy.issued_by]
+    parts.extend(extract_block_text(policy.content_blocks))
+    if isinstance(policy.tags, list):
+        parts.extend(tag for tag in policy.tags if isinstance(tag, str))
+    return fold_search_text(" ".join(part for part in parts if part))
+
+
+def upgrade() -> None:
+    op.add_column(
+        "policies",
+        sa.Column("search_text", sa.Text().with_variant(mysql.MEDIUMTEXT(), "mysql"), nullable=True),
+    )
+    policies = sa.table(
+        "policies",
+        sa.column("id", sa.Integer()),
+        sa.column("title", sa.String()),
+        sa.column("summary", sa.String()),
+        sa.column("description", sa.Text()),
+        sa.column("issued_by", sa.String()),
+        sa.column("content_blocks", sa.JSON()),
+        sa.column("tags", sa.JSON()),
+        sa.column("search_text", sa.Text()),
+    )
+    bind = op.get_bind()
+    for row in bind.execute(sa.select(policies)).all():
+        bind.execute(
+            policies.update()
+            .where(policies.c.id == row.id)
+            .values(search_text=build_policy_search_text(row))
+        )
+    if bind.dialect.name == "mysql":
+        # The default stopword list holds single letters, and the ngram parser
+        # drops every token containing a stopword.
+        op.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+        op.execute(f"CREATE FULLTEXT INDEX {SEARCH_INDEX} ON policies (search_text) WITH PARSER ngram")
+    else:
+        op.create_index(SEARCH_INDEX, "policies", ["search_text"])
+
+
+def downgrade() -> None:
+    op.drop_index(SEARCH_INDEX, table_name="policies")
+    op.drop_column("policies", "search_text")
@@ -0,0 +1,46 @@
+"""Add content-addressed file blobs and stored file names.
+
+Revision ID: 20251226_0014
+Revises: 20251226_0013
+Create Date: 2025-12-26 20:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20251226_0014"
+down_revision = "20251226_0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "file_blobs",
+        sa.Column("hash", sa.String(length=64), nullable=False),
+        sa.Column("extension", sa.String(length=16), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("content_type", sa.String(length=128), nullable=True),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("hash"),
+    )
+    op.create_table(
+        "stored_files",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("blob_hash", sa.String(length=64), sa.ForeignKey("file_blobs.hash"), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_stored_files_id", "stored_files", ["id"])
+    op.create_index("ix_stored_files_blob_hash", "stored_files", ["blob_hash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stored_files_blob_hash", table_name="stored_files")
+    op.drop_index("ix_stored_files_id", table_name="stored_files")
+    op.drop_table("stored_files")
+    op.drop_table("file_blobs")
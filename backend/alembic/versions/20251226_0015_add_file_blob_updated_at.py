@@ -0,0 +1,26 @@
+"""Track when a file blob was last touched so the sweep can spare fresh uploads.
+
+Revision ID: 20251226_0015
+Revises: 20251226_0014
+Create Date: 2025-12-26 21:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20251226_0015"
+down_revision = "20251226_0014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "file_blobs",
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("file_blobs", "updated_at")
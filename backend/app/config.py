@@ -14,16 +14,43 @@ class Settings(BaseSettings):
     db_user: str = Field(..., alias="DB_USER")
     db_password: str = Field(..., alias="DB_PASSWORD")
     db_name: str = Field("ipoor", alias="DB_NAME")
+    db_pool_size: int = Field(10, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(20, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30.0, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(3600, alias="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(True, alias="DB_POOL_PRE_PING")
+    db_counter_pool_size: int = Field(2, alias="DB_COUNTER_POOL_SIZE")
+    threadpool_size: int = Field(40, alias="THREADPOOL_SIZE")
 
     jwt_secret: str = Field(..., alias="JWT_SECRET")
     jwt_algorithm: str = Field("HS256", alias="JWT_ALGORITHM")
     jwt_expire_minutes: int = Field(60, alias="JWT_EXPIRE_MINUTES")
+    refresh_token_expire_days: int = Field(14, alias="REFRESH_TOKEN_EXPIRE_DAYS")
+    # Staleness window: a worker may keep serving a changed user (role, is_active)
+    # from its own cache for this long, since invalidation is per process.
+    auth_cache_seconds: float = Field(5.0, alias="AUTH_CACHE_SECONDS")
+    password_hash_workers: int = Field(2, alias="PASSWORD_HASH_WORKERS")
+    password_hash_queue: int = Field(32, alias="PASSWORD_HASH_QUEUE")
 
     admin_email: str = Field(..., alias="ADMIN_EMAIL")
     admin_password: str = Field(..., alias="ADMIN_PASSWORD")
     admin_full_name: str = Field("System Admin", alias="ADMIN_FULL_NAME")
 
     upload_dir: str = Field("uploads", alias="UPLOAD_DIR")
+    blob_sweep_seconds: float = Field(3600, alias="BLOB_SWEEP_SECONDS")
+    blob_sweep_grace_seconds: float = Field(86400, alias="BLOB_SWEEP_GRACE_SECONDS")
+    file_serving_mode: str = Field("direct", alias="FILE_SERVING_MODE")
+    file_accel_prefix: str = Field("/protected-files", alias="FILE_ACCEL_PREFIX")
+    data_commit_chunk_size: int = Field(500, alias="DATA_COMMIT_CHUNK_SIZE")
+    job_workers: int = Field(2, alias="JOB_WORKERS")
+    job_dir: str = Field("jobs", alias="JOB_DIR")
+
+    compression_level: int = Field(6, alias="COMPRESSION_LEVEL")
+    compression_route_levels: str = Field("/files=0", alias="COMPRESSION_ROUTE_LEVELS")
+    compression_minimum_size: int = Field(1000, alias="COMPRESSION_MINIMUM_SIZE")
+
+    dataset_reload_seconds: float = Field(5.0, alias="DATASET_RELOAD_SECONDS")
+    geometry_cache_dir: str = Field("cache/geometry", alias="GEOMETRY_CACHE_DIR")
 
     class Config:
         env_file = ".env"
@@ -37,12 +64,28 @@ class Settings(BaseSettings):
             f"@{self.db_host}:{self.db_port}/{self.db_name}"
         )
 
+    @property
+    def async_database_url(self) -> str:
+        return (
+            f"mysql+aiomysql://{self.db_user}:{self.db_password}"
+            f"@{self.db_host}:{self.db_port}/{self.db_name}"
+        )
+
     @property
     def cors_origins(self) -> list[str]:
         if self.allowed_origins.strip() == "*":
             return ["*"]
         return [origin.strip() for origin in self.allowed_origins.split(",") if origin.strip()]
 
+    @property
+    def compression_levels(self) -> dict[str, int]:
+        levels: dict[str, int] = {}
+        for item in self.compression_route_levels.split(","):
+            prefix, _, level = item.partition("=")
+            if prefix.strip() and level.strip():
+                levels[prefix.strip()] = int(level)
+        return levels
+
 
 @lru_cache
 def get_settings() -> Settings:
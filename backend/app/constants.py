@@ -22,6 +22,18 @@ class CollectionStatus(str, Enum):
     SUBMITTED = "submitted"
 
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobKind(str, Enum):
+    DATA_COLLECTION_UPLOAD = "data_collection_upload"
+    DATA_COLLECTION_COMMIT = "data_collection_commit"
+
+
 class PolicyCategory(str, Enum):
     DECREE = "decree"
     CIRCULAR = "circular"
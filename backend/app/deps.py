@@ -1,17 +1,33 @@
-from typing import Generator
+import hashlib
+import threading
+import time
+from typing import Any, AsyncGenerator, Generator
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from . import models, schemas
 from .config import get_settings
-from .database import SessionLocal
+from .database import AsyncSessionLocal, SessionLocal
+from .utils.cache import LRUCache
 from .utils.security import verify_password
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+PRINCIPAL_CACHE_MAX_ENTRIES = 10_000
+
+# token sha256 -> (email, generation, token exp, user column values)
+PRINCIPAL_CACHE = LRUCache(
+    max_entries=PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=get_settings().auth_cache_seconds,
+)
+_USER_GENERATIONS: dict[str, int] = {}
+_GENERATIONS_LOCK = threading.Lock()
+
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -21,6 +37,11 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def authenticate_user(db: Session, email: str, password: str) -> models.User | None:
     user = db.query(models.User).filter(models.User.email == email).first()
     if not user or not verify_password(password, user.hashed_password):
@@ -28,6 +49,34 @@ def authenticate_user(db: Session, email: str, password: str) -> models.User | N
     return user
 
 
+def get_user_generation(email: str) -> int:
+    with _GENERATIONS_LOCK:
+        return _USER_GENERATIONS.get(email, 0)
+
+
+def invalidate_user(email: str) -> None:
+    """Drop every cached principal for ``email``; call after changing the user row.
+
+    Only this process's cache is invalidated; other workers keep serving the
+    old row until their entry expires, so AUTH_CACHE_SECONDS is the longest a
+    role or is_active change can go unnoticed.
+    """
+    with _GENERATIONS_LOCK:
+        _USER_GENERATIONS[email] = _USER_GENERATIONS.get(email, 0) + 1
+
+
+def snapshot_user(user: models.User) -> dict[str, Any]:
+    return {attr.key: getattr(user, attr.key) for attr in inspect(models.User).column_attrs}
+
+
+def restore_user(db: Session, columns: dict[str, Any]) -> models.User:
+    """Rebuild a cached user and attach it to ``db`` as if it had been loaded."""
+    user = models.User(**columns)
+    make_transient_to_detached(user)
+    db.add(user)
+    return user
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
 ) -> models.User:
@@ -37,6 +86,14 @@ def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    token_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    cached = PRINCIPAL_CACHE.get(token_key) if settings.auth_cache_seconds > 0 else None
+    if cached is not None:
+        email, generation, expires_at, columns = cached
+        if generation == get_user_generation(email) and (expires_at is None or expires_at > time.time()):
+            return restore_user(db, columns)
+        PRINCIPAL_CACHE.delete(token_key)
+
     try:
         payload = jwt.decode(
             token, settings.jwt_secret, algorithms=[settings.jwt_algorithm]
@@ -47,7 +104,12 @@ def get_current_user(
         token_data = schemas.TokenData(email=email)
     except JWTError:
         raise credentials_exception
+    generation = get_user_generation(token_data.email)
     user = db.query(models.User).filter(models.User.email == token_data.email).first()
     if user is None:
         raise credentials_exception
+    if settings.auth_cache_seconds > 0:
+        PRINCIPAL_CACHE.set(
+            token_key, (token_data.email, generation, payload.get("exp"), snapshot_user(user))
+        )
     return user
@@ -1,20 +1,44 @@
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.gzip import GZipMiddleware
-from fastapi.staticfiles import StaticFiles
 
 from . import routers
 from .config import get_settings
-from .database import engine
+from .database import async_engine, engine
+from .utils.blob_store import start_blob_sweeper, stop_blob_sweeper
+from .utils.compression import CompressionMiddleware
+from .utils.household_code import dispose_counter_engines
+from .utils.jobs import shutdown_jobs, start_jobs
+from .utils.pagination import NEXT_CURSOR_HEADER
+from .utils.security import shutdown_password_pool, start_password_pool
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync routes and dependencies run on this pool; its default of 40 threads caps concurrency.
+    to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+    start_password_pool()
+    start_blob_sweeper()
+    start_jobs()
+    yield
+    stop_blob_sweeper()
+    shutdown_jobs()
+    shutdown_password_pool()
+    dispose_counter_engines()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title="iPOOR API",
     version="0.1.0",
     description="Backend services for the iPOOR platform",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -23,22 +47,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
+)
+app.add_middleware(
+    CompressionMiddleware,
+    level=settings.compression_level,
+    route_levels=settings.compression_levels,
+    minimum_size=settings.compression_minimum_size,
 )
-app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 app.include_router(routers.health.router)
 app.include_router(routers.auth.router)
 app.include_router(routers.households.router)
 app.include_router(routers.policies.router)
 app.include_router(routers.data_collections.router)
+app.include_router(routers.jobs.router)
 app.include_router(routers.activity_logs.router)
 app.include_router(routers.files.router)
 app.include_router(routers.gis.router)
 app.include_router(routers.dashboard.router)
 app.include_router(routers.locations.router)
 
-app.mount("/files", StaticFiles(directory=settings.upload_dir), name="files")
-
 
 @app.get("/")
 def root() -> dict[str, str]:
@@ -1,15 +1,25 @@
 from .activity_log import ActivityLog
 from .data_collection import DataCollection
+from .file_blob import FileBlob
 from .household import Household
+from .household_code_counter import HouseholdCodeCounter
+from .job import Job
 from .policy import Policy
 from .policy_draft import PolicyDraft
+from .refresh_token import RefreshToken
+from .stored_file import StoredFile
 from .user import User
 
 __all__ = [
     "ActivityLog",
     "DataCollection",
+    "FileBlob",
     "Household",
+    "HouseholdCodeCounter",
+    "Job",
     "Policy",
     "PolicyDraft",
+    "RefreshToken",
+    "StoredFile",
     "User",
 ]
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+
+from ..database import Base
+
+
+class FileBlob(Base):
+    __tablename__ = "file_blobs"
+
+    # sha256 of the content; the file lives at blobs/<hash[:2]>/<hash[2:4]>/<hash><extension>.
+    hash = Column(String(64), primary_key=True)
+    extension = Column(String(16), nullable=False, default="")
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String(128), nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Bumped by every upload, acquire and release; the sweep spares recently touched blobs.
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
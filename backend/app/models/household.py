@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Date, DateTime, Enum, Float, Integer, String, Text
+from sqlalchemy import Column, Date, DateTime, Enum, Float, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from ..constants import PovertyStatus
@@ -9,13 +9,16 @@ from ..database import Base
 
 class Household(Base):
     __tablename__ = "households"
+    __table_args__ = (
+        Index("ix_households_geo_status", "province", "district", "commune", "poverty_status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     household_code = Column(String(64), unique=True, index=True, nullable=False)
     head_name = Column(String(255), nullable=False)
     birth_date = Column(Date, nullable=True)
     gender = Column(String(16), nullable=True)
-    id_card = Column(String(20), nullable=True)
+    id_card = Column(String(20), nullable=True, index=True)
     address_line = Column(Text, nullable=True)
     province = Column(String(120), nullable=False)
     district = Column(String(120), nullable=False)
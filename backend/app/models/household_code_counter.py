@@ -0,0 +1,10 @@
+from sqlalchemy import BigInteger, Column, String
+
+from ..database import Base
+
+
+class HouseholdCodeCounter(Base):
+    __tablename__ = "household_code_counters"
+
+    name = Column(String(64), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, Enum, ForeignKey, Integer, String, Text
+
+from ..constants import JobKind, JobStatus
+from ..database import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(
+        Enum(JobKind, values_callable=lambda value: [entry.value for entry in value]),
+        nullable=False,
+    )
+    status = Column(
+        Enum(JobStatus, values_callable=lambda value: [entry.value for entry in value]),
+        default=JobStatus.QUEUED,
+        nullable=False,
+    )
+    total = Column(Integer, nullable=True)
+    processed = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
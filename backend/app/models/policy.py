@@ -1,14 +1,25 @@
 from datetime import datetime
+from typing import Any
 
-from sqlalchemy import JSON, Boolean, Column, Date, DateTime, Enum, Integer, String, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import JSON, Boolean, Column, Date, DateTime, Enum, Index, Integer, String, Text, event
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import deferred, relationship
 
 from ..constants import POLICY_SUMMARY_MAX_LENGTH, PolicyCategory
 from ..database import Base
+from ..utils.text import extract_block_text, fold_search_text
 
 
 class Policy(Base):
     __tablename__ = "policies"
+    __table_args__ = (
+        Index(
+            "ix_policies_search_text",
+            "search_text",
+            mysql_prefix="FULLTEXT",
+            mysql_with_parser="ngram",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -24,5 +35,23 @@ class Policy(Base):
     attachment_url = Column(String(1024), nullable=True)
     tags = Column(JSON, nullable=True)
     is_public = Column(Boolean, nullable=True)
+    # Folded copy of the searchable fields, kept in sync on every insert/update;
+    # deferred so listings do not load it.
+    search_text = deferred(Column(Text().with_variant(mysql.MEDIUMTEXT(), "mysql"), nullable=True))
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+def build_policy_search_text(policy: Any) -> str:
+    """``search_text`` for anything with the policy's attributes (a model or a row)."""
+    parts = [policy.title, policy.summary, policy.description, policy.issued_by]
+    parts.extend(extract_block_text(policy.content_blocks))
+    if isinstance(policy.tags, list):
+        parts.extend(tag for tag in policy.tags if isinstance(tag, str))
+    return fold_search_text(" ".join(part for part in parts if part))
+
+
+@event.listens_for(Policy, "before_insert")
+@event.listens_for(Policy, "before_update")
+def refresh_policy_search_text(mapper: Any, connection: Any, policy: Policy) -> None:
+    policy.search_text = build_policy_search_text(policy)
@@ -1,4 +1,4 @@
-from . import activity_logs, auth, data_collections, dashboard, health, households, policies, files, gis, locations
+from . import activity_logs, auth, data_collections, dashboard, health, households, jobs, policies, files, gis, locations
 
 __all__ = [
     "activity_logs",
@@ -7,6 +7,7 @@ __all__ = [
     "dashboard",
     "health",
     "households",
+    "jobs",
     "policies",
     "files",
     "gis",
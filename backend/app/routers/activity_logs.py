@@ -1,11 +1,13 @@
 from datetime import date, datetime, time
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import String, cast, or_
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import String, cast, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import deps, models, schemas
 from ..constants import DEFAULT_PAGE_LIMIT
+from ..utils.pagination import NEXT_CURSOR_HEADER, apply_keyset, split_page
 
 router = APIRouter(prefix="/activity-logs", tags=["activity_logs"])
 ACTIVITY_LOG_DEFAULT_LIMIT = 50
@@ -13,23 +15,25 @@ ACTIVITY_LOG_MAX_LIMIT = 50
 
 
 @router.get("", response_model=list[schemas.ActivityLogRead])
-def list_activity_logs(
+async def list_activity_logs(
+    response: Response,
     skip: int = 0,
     q: str | None = Query(None, min_length=1),
     action: str | None = None,
     date_from: date | None = None,
     date_to: date | None = None,
     limit: int = Query(ACTIVITY_LOG_DEFAULT_LIMIT, le=ACTIVITY_LOG_MAX_LIMIT),
-    db: Session = Depends(deps.get_db),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: models.User = Depends(deps.get_current_user),
 ) -> list[models.ActivityLog]:
     query = (
-        db.query(models.ActivityLog, models.User)
+        select(models.ActivityLog, models.User)
         .outerjoin(models.User, models.User.id == models.ActivityLog.user_id)
     )
     if q:
         keyword = f"%{q.strip()}%"
-        query = query.filter(
+        query = query.where(
             or_(
                 models.User.email.ilike(keyword),
                 models.User.full_name.ilike(keyword),
@@ -41,23 +45,26 @@ def list_activity_logs(
     if action and action != "all":
         action_value = action.strip().lower()
         if action_value in {"create", "update", "delete", "view"}:
-            query = query.filter(models.ActivityLog.action.ilike(f"{action_value}%"))
+            query = query.where(models.ActivityLog.action.ilike(f"{action_value}%"))
         elif action_value == "post":
-            query = query.filter(models.ActivityLog.action.ilike("%policy%"))
+            query = query.where(models.ActivityLog.action.ilike("%policy%"))
         elif action_value == "upload":
-            query = query.filter(models.ActivityLog.action.ilike("%upload%"))
+            query = query.where(models.ActivityLog.action.ilike("%upload%"))
         else:
-            query = query.filter(models.ActivityLog.action == action_value)
+            query = query.where(models.ActivityLog.action == action_value)
     if date_from:
-        query = query.filter(models.ActivityLog.created_at >= datetime.combine(date_from, time.min))
+        query = query.where(models.ActivityLog.created_at >= datetime.combine(date_from, time.min))
     if date_to:
-        query = query.filter(models.ActivityLog.created_at <= datetime.combine(date_to, time.max))
-    logs = (
-        query.order_by(models.ActivityLog.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+        query = query.where(models.ActivityLog.created_at <= datetime.combine(date_to, time.max))
+    keys = [models.ActivityLog.created_at, models.ActivityLog.id]
+    query = apply_keyset(query, keys, cursor, limit)
+    if not cursor:
+        query = query.offset(skip)
+    logs, next_cursor = split_page(
+        (await db.execute(query)).all(), limit, lambda row: (row[0].created_at, row[0].id)
     )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     items: list[schemas.ActivityLogRead] = []
     for log, user in logs:
         items.append(
@@ -1,7 +1,7 @@
+import uuid
+from datetime import datetime, timedelta
 from pathlib import Path
-from urllib.parse import quote
 
-import aiofiles
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
 from pydantic import EmailStr
 from sqlalchemy.orm import Session
@@ -9,19 +9,81 @@ from sqlalchemy.orm import Session
 from .. import deps, models, schemas
 from ..config import get_settings
 from ..constants import Roles
-from ..utils.security import create_access_token, get_password_hash, verify_password
+from ..utils.security import (
+    create_access_token,
+    create_refresh_token,
+    get_password_hash,
+    hash_refresh_token,
+    verify_password,
+)
+from ..utils.blob_store import BlobTooLargeError, spool_file, store_file
 from ..utils.file_naming import FILENAME_MAX_LENGTH, FILENAME_SEPARATOR, slugify_filename
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 settings = get_settings()
-UPLOAD_DIR = Path(settings.upload_dir)
-USER_UPLOAD_SUBDIR = "users"
 MAX_CCCD_BYTES = 5 * 1024 * 1024
 ALLOWED_CCCD_TYPES = {"image/png"}
+# Tabs or retried requests can refresh the same token at once; the loser of the
+# row lock sees it rotated a moment ago and must not be treated as a thief.
+REFRESH_TOKEN_REUSE_GRACE_SECONDS = 10
+
+
+def issue_refresh_token(db: Session, user_id: int, family_id: str | None = None) -> str:
+    """Store a new refresh token for ``user_id`` and return it; the caller commits."""
+    now = datetime.utcnow()
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.user_id == user_id,
+        models.RefreshToken.expires_at < now,
+    ).delete(synchronize_session=False)
+    token = create_refresh_token()
+    db.add(
+        models.RefreshToken(
+            user_id=user_id,
+            family_id=family_id or uuid.uuid4().hex,
+            token_hash=hash_refresh_token(token),
+            expires_at=now + timedelta(days=settings.refresh_token_expire_days),
+        )
+    )
+    return token
+
+
+def revoke_refresh_tokens(db: Session, *criteria) -> None:
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.revoked_at.is_(None), *criteria
+    ).update({"revoked_at": datetime.utcnow()}, synchronize_session=False)
+
+
+def find_refresh_token(db: Session, token: str) -> models.RefreshToken | None:
+    return (
+        db.query(models.RefreshToken)
+        .filter(models.RefreshToken.token_hash == hash_refresh_token(token))
+        .with_for_update()
+        .first()
+    )
+
+
+def is_recent_rotation(db: Session, stored: models.RefreshToken, now: datetime) -> bool:
+    """Whether ``stored`` was rotated (not logged out or revoked) within the grace window.
+
+    Rotation leaves a live successor in the family; logout, password changes
+    and reuse detection revoke the whole family.
+    """
+    if stored.revoked_at < now - timedelta(seconds=REFRESH_TOKEN_REUSE_GRACE_SECONDS):
+        return False
+    return (
+        db.query(models.RefreshToken.id)
+        .filter(
+            models.RefreshToken.family_id == stored.family_id,
+            models.RefreshToken.revoked_at.is_(None),
+            models.RefreshToken.expires_at > now,
+        )
+        .first()
+        is not None
+    )
 
 
 @router.post("/register", response_model=schemas.UserRead, status_code=status.HTTP_201_CREATED)
-async def register_user(
+def register_user(
     email: EmailStr = Form(...),
     full_name: str = Form(..., min_length=2),
     password: str = Form(..., min_length=8),
@@ -43,57 +105,43 @@ async def register_user(
     if cccd_image.content_type not in ALLOWED_CCCD_TYPES:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only PNG files are allowed")
 
-    target_dir = UPLOAD_DIR / USER_UPLOAD_SUBDIR
-    target_dir.mkdir(parents=True, exist_ok=True)
+    # Sync route: hashing, spooling and the blob write all run in the threadpool.
+    hashed_password = get_password_hash(password)
+    try:
+        spooled = spool_file(cccd_image.file, MAX_CCCD_BYTES)
+    except BlobTooLargeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File exceeds 5MB")
+
     extension = Path(cccd_image.filename or "").suffix or ".png"
     safe_cccd = slugify_filename(cccd or "")
     safe_name = slugify_filename(full_name)
     prefix_parts = [part for part in ["cccd", safe_cccd, safe_name] if part]
     raw_name = f"{FILENAME_SEPARATOR.join(prefix_parts)}{extension}"
     stored_name = raw_name[:FILENAME_MAX_LENGTH]
-    file_path = target_dir / stored_name
-    counter = 1
-    stem = Path(stored_name).stem
-    while file_path.exists():
-        candidate = f"{stem}{FILENAME_SEPARATOR}{counter}{extension}"
-        stored_name = candidate[:FILENAME_MAX_LENGTH]
-        file_path = target_dir / stored_name
-        counter += 1
-
-    total_bytes = 0
-    try:
-        async with aiofiles.open(file_path, "wb") as out_file:
-            while True:
-                chunk = await cccd_image.read(1024 * 1024)
-                if not chunk:
-                    break
-                total_bytes += len(chunk)
-                if total_bytes > MAX_CCCD_BYTES:
-                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File exceeds 5MB")
-                await out_file.write(chunk)
-    except HTTPException:
-        if file_path.exists():
-            file_path.unlink(missing_ok=True)
-        raise
-
-    image_url = f"/files/{USER_UPLOAD_SUBDIR}/{quote(stored_name)}"
+
     user = models.User(
         email=email,
         full_name=full_name,
-        hashed_password=get_password_hash(password),
+        hashed_password=hashed_password,
         role=role,
         org_level=org_level,
         org_name=org_name,
         position=position,
         cccd=cccd,
-        cccd_image_url=image_url,
         province=province,
         district=district,
         commune=commune,
         is_active=is_active,
     )
-    db.add(user)
-    db.commit()
+    try:
+        db.add(user)
+        db.flush()
+        user.cccd_image_url = store_file(
+            db, spooled, stored_name, cccd_image.content_type, user.id
+        )
+        db.commit()
+    finally:
+        spooled.discard()
     db.refresh(user)
     return user
 
@@ -112,7 +160,51 @@ def login(
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is inactive")
     token = create_access_token(subject=user.email)
-    return schemas.Token(access_token=token)
+    refresh_token = issue_refresh_token(db, user.id)
+    db.commit()
+    return schemas.Token(access_token=token, refresh_token=refresh_token)
+
+
+@router.post("/refresh", response_model=schemas.Token)
+def refresh_access_token(
+    payload: schemas.RefreshTokenRequest, db: Session = Depends(deps.get_db)
+) -> schemas.Token:
+    """Trade a refresh token for a new access token and a new refresh token.
+
+    Each refresh token works once. Presenting one that was already rotated
+    means it leaked, so every token from that login is revoked; a token
+    rotated in the last REFRESH_TOKEN_REUSE_GRACE_SECONDS is a concurrent
+    refresh instead and gets its own successor in the same family.
+    """
+    now = datetime.utcnow()
+    stored = find_refresh_token(db, payload.refresh_token)
+    rotated = stored is not None and stored.revoked_at is not None and is_recent_rotation(db, stored, now)
+    if stored and stored.revoked_at is not None and not rotated:
+        revoke_refresh_tokens(db, models.RefreshToken.family_id == stored.family_id)
+        db.commit()
+    if not stored or (stored.revoked_at is not None and not rotated) or stored.expires_at <= now:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user = db.get(models.User, stored.user_id)
+    if not user or not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is inactive")
+    if stored.revoked_at is None:
+        stored.revoked_at = now
+    refresh_token = issue_refresh_token(db, user.id, stored.family_id)
+    db.commit()
+    token = create_access_token(subject=user.email)
+    return schemas.Token(access_token=token, refresh_token=refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(payload: schemas.RefreshTokenRequest, db: Session = Depends(deps.get_db)) -> None:
+    stored = find_refresh_token(db, payload.refresh_token)
+    if stored:
+        revoke_refresh_tokens(db, models.RefreshToken.family_id == stored.family_id)
+        db.commit()
 
 
 @router.get("/me", response_model=schemas.UserRead)
@@ -130,4 +222,6 @@ def change_password(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Old password is incorrect")
     current_user.hashed_password = get_password_hash(payload.new_password)
     db.add(current_user)
+    revoke_refresh_tokens(db, models.RefreshToken.user_id == current_user.id)
     db.commit()
+    deps.invalidate_user(current_user.email)
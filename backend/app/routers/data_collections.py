@@ -1,33 +1,60 @@
+import codecs
+import csv
+import itertools
+import os
+import shutil
 from datetime import datetime
-from io import BytesIO
 from pathlib import Path
-from typing import Any
-from urllib.parse import quote
-
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
+from typing import Any, BinaryIO, Container, Iterator
+from unicodedata import normalize
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
 from openpyxl import load_workbook
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from .. import deps, models, schemas
 from ..config import get_settings
-from ..constants import CollectionStatus, DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, PovertyStatus
-from ..utils.file_naming import (
-    FILENAME_MAX_LENGTH,
-    FILENAME_SEPARATOR,
-    build_household_prefix,
+from ..constants import (
+    CollectionStatus,
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    JobKind,
+    PovertyStatus,
 )
-from ..utils.household_code import generate_household_code
+from ..utils.blob_store import SpooledBlob, spool_file, store_file
+from ..utils.file_naming import FILENAME_MAX_LENGTH, build_household_prefix
+from ..utils.household_code import allocate_household_codes, generate_household_code
+from ..utils.http_cache import encode_json
+from ..utils.jobs import JobProgress, get_job_dir, new_job_id, submit_job
+from ..utils.pagination import NEXT_CURSOR_HEADER, apply_keyset, split_page
 from ..utils.text import normalize_header, normalize_text
 
 router = APIRouter(prefix="/data-collections", tags=["data_collections"])
 MAX_UPLOAD_BYTES = 50 * 1024 * 1024
 ALLOWED_EXTENSIONS = {".xlsx", ".csv"}
-PDF_SUBDIR = "data-collections"
 UPLOAD_CHUNK_SIZE = 1024 * 1024
 HEADER_ROW_INDEX = 2
 SUBHEADER_ROW_INDEX = 3
 DATA_ROW_INDEX = 6
-ALLOWED_PDF_EXTENSIONS = {".pdf"}
+PDF_EXTENSION = ".pdf"
+PDF_CONTENT_TYPE = "application/pdf"
+ALLOWED_PDF_EXTENSIONS = {PDF_EXTENSION}
 HEADER_ALIASES = {
     "variables": "variables",
     "name": "name",
@@ -85,6 +112,17 @@ REQUIRED_FIELDS = {
     "official_check": "Cán bộ rà soát",
 }
 ATTACHMENT_LABEL = "Tài liệu đính kèm"
+ID_CARD_LOOKUP_CHUNK_SIZE = 1000
+UPLOAD_FORMAT_JSON = "json"
+UPLOAD_FORMAT_NDJSON = "ndjson"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_FLUSH_ROWS = 500
+
+COMMIT_ROWS_ADAPTER = TypeAdapter(list[schemas.DataCollectionCommitRow])
+
+RowSource = tuple[list[Any], list[Any], Iterator[list[Any]]]
+# Request uploads, or copies saved for a background job.
+PdfSource = UploadFile | Path
 
 
 def parse_date(value: Any) -> datetime | None:
@@ -127,6 +165,17 @@ def parse_poverty_status(value: Any) -> str | None:
     return POVERTY_STATUS_MAP.get(text)
 
 
+def find_existing_id_cards(db: Session, id_cards: set[str]) -> set[str]:
+    """Return which of ``id_cards`` already belong to a household, in chunked IN queries."""
+    ordered = sorted(id_cards)
+    existing: set[str] = set()
+    for start in range(0, len(ordered), ID_CARD_LOOKUP_CHUNK_SIZE):
+        chunk = ordered[start : start + ID_CARD_LOOKUP_CHUNK_SIZE]
+        rows = db.query(models.Household.id_card).filter(models.Household.id_card.in_(chunk))
+        existing.update(id_card for (id_card,) in rows)
+    return existing
+
+
 def build_error(row_number: int, column: str, message: str) -> schemas.DataCollectionUploadError:
     return schemas.DataCollectionUploadError(row=row_number, column=column, message=message)
 
@@ -156,28 +205,46 @@ def build_column_map(
     return column_map
 
 
-def parse_excel_rows(file_bytes: bytes) -> tuple[list[Any], list[Any], list[list[Any]]]:
-    workbook = load_workbook(BytesIO(file_bytes), data_only=True)
+def reopen_upload(upload: UploadFile) -> BinaryIO:
+    """Return a second handle on the upload's spooled file, owned by the caller.
+
+    FastAPI closes request files as soon as the endpoint returns, before a
+    streaming body is sent.
+    """
+    handle = os.fdopen(os.dup(upload.file.fileno()), "rb")
+    handle.seek(0)
+    return handle
+
+
+def iter_excel_rows(upload: BinaryIO) -> RowSource:
+    """Open the active sheet read-only; data rows are read lazily from ``upload``."""
+    workbook = load_workbook(upload, read_only=True, data_only=True)
     sheet = workbook.active
-    header_row = [cell.value for cell in sheet[HEADER_ROW_INDEX]]
-    subheader_row = [cell.value for cell in sheet[SUBHEADER_ROW_INDEX]]
-    rows: list[list[Any]] = []
-    for row in sheet.iter_rows(min_row=DATA_ROW_INDEX, values_only=True):
-        rows.append(list(row))
-    return header_row, subheader_row, rows
 
+    def read_row(row_index: int) -> list[Any]:
+        rows = sheet.iter_rows(min_row=row_index, max_row=row_index, values_only=True)
+        return list(next(rows, ()))
+
+    header_row = read_row(HEADER_ROW_INDEX)
+    subheader_row = read_row(SUBHEADER_ROW_INDEX)
 
-def parse_csv_rows(file_bytes: bytes) -> tuple[list[Any], list[Any], list[list[Any]]]:
-    import csv
+    def iter_rows() -> Iterator[list[Any]]:
+        try:
+            for row in sheet.iter_rows(min_row=DATA_ROW_INDEX, values_only=True):
+                yield list(row)
+        finally:
+            workbook.close()
 
-    text = file_bytes.decode("utf-8-sig", errors="ignore")
-    rows: list[list[Any]] = []
-    for row in csv.reader(text.splitlines()):
-        rows.append([cell.strip() for cell in row])
-    header_row = rows[HEADER_ROW_INDEX - 1] if len(rows) >= HEADER_ROW_INDEX else []
-    subheader_row = rows[SUBHEADER_ROW_INDEX - 1] if len(rows) >= SUBHEADER_ROW_INDEX else []
-    data_rows = rows[DATA_ROW_INDEX - 1 :] if len(rows) >= DATA_ROW_INDEX else []
-    return header_row, subheader_row, data_rows
+    return header_row, subheader_row, iter_rows()
+
+
+def iter_csv_rows(upload: BinaryIO) -> RowSource:
+    # A StreamReader, unlike TextIOWrapper, leaves closing ``upload`` to its owner.
+    reader = csv.reader(codecs.getreader("utf-8-sig")(upload, errors="ignore"))
+    leading = [[cell.strip() for cell in row] for row in itertools.islice(reader, DATA_ROW_INDEX - 1)]
+    header_row = leading[HEADER_ROW_INDEX - 1] if len(leading) >= HEADER_ROW_INDEX else []
+    subheader_row = leading[SUBHEADER_ROW_INDEX - 1] if len(leading) >= SUBHEADER_ROW_INDEX else []
+    return header_row, subheader_row, ([cell.strip() for cell in row] for row in reader)
 
 
 def normalize_filename_key(value: str) -> str:
@@ -185,21 +252,20 @@ def normalize_filename_key(value: str) -> str:
     return normalized.casefold()
 
 
-def ensure_unique_path(target_dir: Path, filename: str) -> Path:
-    target_dir.mkdir(parents=True, exist_ok=True)
-    file_path = target_dir / filename
-    if not file_path.exists():
-        return file_path
-    extension = file_path.suffix
-    stem = file_path.stem
-    counter = 1
-    while True:
-        candidate = f"{stem}{FILENAME_SEPARATOR}{counter}{extension}"
-        candidate = candidate[:FILENAME_MAX_LENGTH]
-        file_path = target_dir / candidate
-        if not file_path.exists():
-            return file_path
-        counter += 1
+def build_pdf_lookup(pdf_files: list[UploadFile] | None) -> dict[str, UploadFile]:
+    pdf_lookup: dict[str, UploadFile] = {}
+    for pdf_file in pdf_files or []:
+        if not pdf_file.filename:
+            continue
+        suffix = Path(pdf_file.filename).suffix.lower()
+        if suffix not in ALLOWED_PDF_EXTENSIONS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Only PDF files are allowed",
+            )
+        key = normalize_filename_key(Path(pdf_file.filename).name)
+        pdf_lookup[key] = pdf_file
+    return pdf_lookup
 
 
 def save_upload_file(upload_file: UploadFile, dest_path: Path) -> None:
@@ -212,27 +278,157 @@ def save_upload_file(upload_file: UploadFile, dest_path: Path) -> None:
             output.write(chunk)
 
 
-@router.post("/upload", response_model=schemas.DataCollectionUploadResult)
-def upload_data_collection(
-    file: UploadFile = File(...),  # noqa: B008
-    pdf_files: list[UploadFile] | None = File(None),
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user),
-) -> schemas.DataCollectionUploadResult:
+def validate_row(
+    index: int,
+    row: list[Any],
+    column_map: dict[str, int],
+    pdf_keys: Container[str],
+    existing_id_cards: set[str],
+    id_card_rows: dict[str, int],
+) -> schemas.DataCollectionUploadRow | None:
+    """Validate one spreadsheet row; blank rows return None."""
+    values = {
+        key: get_cell_value(row, col) for key, col in column_map.items()
+    }
+    row_errors: list[schemas.DataCollectionUploadError] = []
+    for key, label in REQUIRED_FIELDS.items():
+        if normalize_text(values.get(key)) == "":
+            row_errors.append(build_error(index, label, "Thiếu dữ liệu"))
+
+    if all(normalize_text(value) == "" for value in values.values()):
+        return None
+
+    members = parse_int(values.get("family_mem"))
+    if members is None:
+        row_errors.append(build_error(index, REQUIRED_FIELDS["family_mem"], "Không hợp lệ"))
+
+    b1_score = parse_int(values.get("B1_score"))
+    if b1_score is None:
+        row_errors.append(build_error(index, REQUIRED_FIELDS["B1_score"], "Không hợp lệ"))
+
+    b2_score = parse_int(values.get("B2_score"))
+    if b2_score is None:
+        row_errors.append(build_error(index, REQUIRED_FIELDS["B2_score"], "Không hợp lệ"))
+
+    poverty_status = parse_poverty_status(values.get("classified_after_check"))
+    if poverty_status is None:
+        row_errors.append(build_error(index, REQUIRED_FIELDS["classified_after_check"], "Không hợp lệ"))
+
+    collected_at = parse_date(values.get("date_check"))
+    if values.get("date_check") and not collected_at:
+        row_errors.append(build_error(index, REQUIRED_FIELDS["date_check"], "Sai định dạng ngày"))
+
+    id_card = normalize_text(values.get("ID_num"))
+    if id_card:
+        if id_card in existing_id_cards:
+            row_errors.append(build_error(index, REQUIRED_FIELDS["ID_num"], "CCCD đã tồn tại"))
+        first_row = id_card_rows.setdefault(id_card, index)
+        if first_row != index:
+            row_errors.append(
+                build_error(index, REQUIRED_FIELDS["ID_num"], f"CCCD trùng với dòng {first_row}")
+            )
+    pdf_ref = normalize_text(values.get("pdf_url"))
+    if pdf_ref:
+        if normalize_filename_key(Path(pdf_ref).name) not in pdf_keys:
+            row_errors.append(build_error(index, ATTACHMENT_LABEL, "Không tìm thấy file PDF"))
+
+    return schemas.DataCollectionUploadRow(
+        row=index,
+        name=normalize_text(values.get("name")) or None,
+        id_card=id_card or None,
+        poverty_status=normalize_text(values.get("classified_after_check")) or None,
+        birth_date=normalize_text(values.get("dob")) or None,
+        gender=normalize_text(values.get("gender")) or None,
+        ethnic=normalize_text(values.get("ethnic")) or None,
+        address_line=normalize_text(values.get("address_line")) or None,
+        family_mem=members,
+        classified_before_check=normalize_text(values.get("classified_before_check")) or None,
+        b1_score=b1_score,
+        b2_score=b2_score,
+        income_per_capita=parse_float(values.get("income_per_capita")),
+        area=normalize_text(values.get("area")) or None,
+        description=normalize_text(values.get("description")) or None,
+        note=normalize_text(values.get("note")) or None,
+        pdf_url=pdf_ref or None,
+        province=normalize_text(values.get("province")) or None,
+        district=normalize_text(values.get("district")) or None,
+        commune=normalize_text(values.get("commune")) or None,
+        village=normalize_text(values.get("village")) or None,
+        date_check=normalize_text(values.get("date_check")) or None,
+        official_check=normalize_text(values.get("official_check")) or None,
+        valid=len(row_errors) == 0,
+        errors=row_errors,
+    )
+
+
+def validate_rows(
+    db: Session,
+    rows: Iterator[list[Any]],
+    column_map: dict[str, int],
+    pdf_keys: Container[str],
+) -> Iterator[schemas.DataCollectionUploadRow]:
+    """Validate rows lazily, looking up existing CCCDs once per chunk of rows."""
+    id_card_column = column_map["ID_num"]
+    id_card_rows: dict[str, int] = {}
+    numbered = enumerate(rows, start=DATA_ROW_INDEX)
+    while batch := list(itertools.islice(numbered, ID_CARD_LOOKUP_CHUNK_SIZE)):
+        id_cards = {normalize_text(get_cell_value(row, id_card_column)) for _, row in batch}
+        existing_id_cards = find_existing_id_cards(db, id_cards - {""})
+        for index, row in batch:
+            summary = validate_row(index, row, column_map, pdf_keys, existing_id_cards, id_card_rows)
+            if summary is not None:
+                yield summary
+
+
+def stream_upload_results(
+    db: Session, source: BinaryIO, summaries: Iterator[schemas.DataCollectionUploadRow]
+) -> Iterator[bytes]:
+    """One JSON line per row, then a final line with validRecords/errorRecords."""
+    valid_count = 0
+    error_count = 0
+    lines: list[bytes] = []
+    try:
+        for summary in summaries:
+            if summary.valid:
+                valid_count += 1
+            else:
+                error_count += 1
+            lines.append(summary.model_dump_json().encode("utf-8"))
+            if len(lines) >= NDJSON_FLUSH_ROWS:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+        lines.append(encode_json({"validRecords": valid_count, "errorRecords": error_count}))
+        yield b"\n".join(lines) + b"\n"
+    finally:
+        source.close()
+        # The request's session is torn down before the body is streamed; release
+        # the connection the lookups reopened.
+        db.close()
+
+
+def check_upload_file(file: UploadFile) -> str:
+    """Reject unusable uploads and return the file's extension."""
     if not file.filename:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing file")
     extension = "." + file.filename.split(".")[-1].lower()
     if extension not in ALLOWED_EXTENSIONS:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported file type")
-    file_bytes = file.file.read()
-    if len(file_bytes) > MAX_UPLOAD_BYTES:
+    file.file.seek(0, os.SEEK_END)
+    file_size = file.file.tell()
+    file.file.seek(0)
+    if file_size > MAX_UPLOAD_BYTES:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File too large")
+    return extension
+
 
+def read_upload_source(
+    source: BinaryIO, extension: str
+) -> tuple[dict[str, int], Iterator[list[Any]]]:
+    """Map the header columns and return them with the lazy data rows."""
     if extension == ".xlsx":
-        header_row, subheader_row, rows = parse_excel_rows(file_bytes)
+        header_row, subheader_row, rows = iter_excel_rows(source)
     else:
-        header_row, subheader_row, rows = parse_csv_rows(file_bytes)
-
+        header_row, subheader_row, rows = iter_csv_rows(source)
     column_map = build_column_map(header_row, subheader_row)
     missing_columns = [label for key, label in REQUIRED_FIELDS.items() if key not in column_map]
     if missing_columns:
@@ -241,104 +437,23 @@ def upload_data_collection(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Missing columns: {joined}",
         )
+    return column_map, rows
 
-    pdf_lookup: dict[str, UploadFile] = {}
-    if pdf_files:
-        for pdf_file in pdf_files:
-            if not pdf_file.filename:
-                continue
-            suffix = Path(pdf_file.filename).suffix.lower()
-            if suffix not in ALLOWED_PDF_EXTENSIONS:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Only PDF files are allowed",
-                )
-            key = normalize_filename_key(Path(pdf_file.filename).name)
-            pdf_lookup[key] = pdf_file
+
+def summarize_upload(
+    summaries: Iterator[schemas.DataCollectionUploadRow],
+    progress: JobProgress | None = None,
+) -> schemas.DataCollectionUploadResult:
     errors: list[schemas.DataCollectionUploadError] = []
     row_summaries: list[schemas.DataCollectionUploadRow] = []
     valid_count = 0
     error_count = 0
-    for index, row in enumerate(rows, start=DATA_ROW_INDEX):
-        values = {
-            key: get_cell_value(row, col) for key, col in column_map.items()
-        }
-        row_errors: list[schemas.DataCollectionUploadError] = []
-        for key, label in REQUIRED_FIELDS.items():
-            if normalize_text(values.get(key)) == "":
-                row_errors.append(build_error(index, label, "Thiếu dữ liệu"))
-
-        if all(normalize_text(value) == "" for value in values.values()):
-            continue
-
-        members = parse_int(values.get("family_mem"))
-        if members is None:
-            row_errors.append(build_error(index, REQUIRED_FIELDS["family_mem"], "Không hợp lệ"))
-
-        b1_score = parse_int(values.get("B1_score"))
-        if b1_score is None:
-            row_errors.append(build_error(index, REQUIRED_FIELDS["B1_score"], "Không hợp lệ"))
-
-        b2_score = parse_int(values.get("B2_score"))
-        if b2_score is None:
-            row_errors.append(build_error(index, REQUIRED_FIELDS["B2_score"], "Không hợp lệ"))
-
-        poverty_status = parse_poverty_status(values.get("classified_after_check"))
-        if poverty_status is None:
-            row_errors.append(build_error(index, REQUIRED_FIELDS["classified_after_check"], "Không hợp lệ"))
-
-        collected_at = parse_date(values.get("date_check"))
-        if values.get("date_check") and not collected_at:
-            row_errors.append(build_error(index, REQUIRED_FIELDS["date_check"], "Sai định dạng ngày"))
-
-        birth_date = parse_date(values.get("dob"))
-        id_card = normalize_text(values.get("ID_num"))
-        if id_card:
-            exists = (
-                db.query(models.Household)
-                .filter(models.Household.id_card == id_card)
-                .first()
-            )
-            if exists:
-                row_errors.append(build_error(index, REQUIRED_FIELDS["ID_num"], "CCCD đã tồn tại"))
-        pdf_ref = normalize_text(values.get("pdf_url"))
-        if pdf_ref:
-            pdf_key = normalize_filename_key(Path(pdf_ref).name)
-            pdf_file = pdf_lookup.get(pdf_key)
-            if not pdf_file:
-                row_errors.append(build_error(index, ATTACHMENT_LABEL, "Không tìm thấy file PDF"))
-
-        row_summary = schemas.DataCollectionUploadRow(
-            row=index,
-            name=normalize_text(values.get("name")) or None,
-            id_card=id_card or None,
-            poverty_status=normalize_text(values.get("classified_after_check")) or None,
-            birth_date=normalize_text(values.get("dob")) or None,
-            gender=normalize_text(values.get("gender")) or None,
-            ethnic=normalize_text(values.get("ethnic")) or None,
-            address_line=normalize_text(values.get("address_line")) or None,
-            family_mem=members,
-            classified_before_check=normalize_text(values.get("classified_before_check")) or None,
-            b1_score=b1_score,
-            b2_score=b2_score,
-            income_per_capita=parse_float(values.get("income_per_capita")),
-            area=normalize_text(values.get("area")) or None,
-            description=normalize_text(values.get("description")) or None,
-            note=normalize_text(values.get("note")) or None,
-            pdf_url=pdf_ref or None,
-            province=normalize_text(values.get("province")) or None,
-            district=normalize_text(values.get("district")) or None,
-            commune=normalize_text(values.get("commune")) or None,
-            village=normalize_text(values.get("village")) or None,
-            date_check=normalize_text(values.get("date_check")) or None,
-            official_check=normalize_text(values.get("official_check")) or None,
-            valid=len(row_errors) == 0,
-            errors=row_errors,
-        )
+    for row_summary in summaries:
         row_summaries.append(row_summary)
-
-        if row_errors:
-            errors.extend(row_errors)
+        if progress:
+            progress.advance(failed=1 if row_summary.errors else 0)
+        if row_summary.errors:
+            errors.extend(row_summary.errors)
             error_count += 1
             continue
         valid_count += 1
@@ -351,6 +466,232 @@ def upload_data_collection(
     )
 
 
+@router.post("/upload", response_model=schemas.DataCollectionUploadResult)
+def upload_data_collection(
+    file: UploadFile = File(...),  # noqa: B008
+    pdf_files: list[UploadFile] | None = File(None),
+    output_format: str = Query(
+        UPLOAD_FORMAT_JSON,
+        alias="format",
+        pattern=f"^({UPLOAD_FORMAT_JSON}|{UPLOAD_FORMAT_NDJSON})$",
+    ),
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+) -> schemas.DataCollectionUploadResult | StreamingResponse:
+    """Validate an uploaded sheet without loading it into memory.
+
+    With ``format=ndjson`` each row result is streamed as it is validated,
+    followed by a line with the totals.
+    """
+    extension = check_upload_file(file)
+    pdf_lookup = build_pdf_lookup(pdf_files)
+
+    source = reopen_upload(file)
+    try:
+        column_map, rows = read_upload_source(source, extension)
+    except BaseException:
+        source.close()
+        raise
+
+    summaries = validate_rows(db, rows, column_map, pdf_lookup)
+    if output_format == UPLOAD_FORMAT_NDJSON:
+        return StreamingResponse(
+            stream_upload_results(db, source, summaries), media_type=NDJSON_MEDIA_TYPE
+        )
+    try:
+        return summarize_upload(summaries)
+    finally:
+        source.close()
+
+
+def run_upload_job(
+    db: Session,
+    progress: JobProgress,
+    source_path: str,
+    extension: str,
+    pdf_keys: list[str],
+) -> dict[str, Any]:
+    with open(source_path, "rb") as source:
+        column_map, rows = read_upload_source(source, extension)
+        summaries = validate_rows(db, rows, column_map, set(pdf_keys))
+        return summarize_upload(summaries, progress).model_dump(mode="json")
+
+
+@router.post("/upload/jobs", response_model=schemas.JobRead, status_code=status.HTTP_202_ACCEPTED)
+def upload_data_collection_job(
+    response: Response,
+    file: UploadFile = File(...),  # noqa: B008
+    pdf_files: list[UploadFile] | None = File(None),
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+) -> models.Job:
+    """Validate like /upload in a background job; poll /jobs/{id} for the result."""
+    extension = check_upload_file(file)
+    pdf_lookup = build_pdf_lookup(pdf_files)
+    job_id = new_job_id()
+    job_dir = get_job_dir(job_id)
+    source_path = job_dir / f"source{extension}"
+    try:
+        job_dir.mkdir(parents=True, exist_ok=True)
+        save_upload_file(file, source_path)
+        job = submit_job(
+            db,
+            job_id,
+            current_user.id,
+            JobKind.DATA_COLLECTION_UPLOAD,
+            run_upload_job,
+            str(source_path),
+            extension,
+            list(pdf_lookup),
+        )
+    except BaseException:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job
+
+
+def build_commit_household(
+    row: schemas.DataCollectionCommitRow,
+    household_code: str,
+    poverty_status: str,
+    attachment_url: str | None,
+) -> dict[str, Any]:
+    birth_date = parse_date(row.dob)
+    collected_at = parse_date(row.date_check)
+    return {
+        "household_code": household_code,
+        "head_name": normalize_text(row.name),
+        "birth_date": birth_date.date() if birth_date else None,
+        "gender": normalize_text(row.gender) or None,
+        "ethnicity": normalize_text(row.ethnic) or None,
+        "id_card": normalize_text(row.id_num) or None,
+        "members_count": row.family_mem,
+        "income_per_capita": row.income_per_capita,
+        "poverty_status": poverty_status,
+        "score_b1": row.b1_score,
+        "score_b2": row.b2_score,
+        "note": normalize_text(row.description) or None,
+        "remark": normalize_text(row.note) or None,
+        "area": normalize_text(row.area) or None,
+        "village": normalize_text(row.village) or None,
+        "officer": normalize_text(row.official_check) or None,
+        "commune": normalize_text(row.commune) or "Chưa rõ",
+        "province": normalize_text(row.province) or "Chưa rõ",
+        "district": normalize_text(row.district) or "Chưa rõ",
+        "address_line": normalize_text(row.address_line) or None,
+        "attachment_url": attachment_url,
+        "last_surveyed_at": collected_at.date() if collected_at else None,
+    }
+
+
+def build_commit_notes(row: schemas.DataCollectionCommitRow) -> str:
+    before = normalize_text(row.classified_before_check)
+    after = normalize_text(row.classified_after_check)
+    return f"Before: {before}; After: {after}"
+
+
+def spool_pdf(pdf_file: PdfSource) -> SpooledBlob:
+    if isinstance(pdf_file, Path):
+        with pdf_file.open("rb") as source:
+            return spool_file(source)
+    pdf_file.file.seek(0)
+    return spool_file(pdf_file.file)
+
+
+def store_commit_pdf(
+    db: Session,
+    spooled: SpooledBlob,
+    row: schemas.DataCollectionCommitRow,
+    household_code: str,
+    poverty_status: str,
+    collector_id: int,
+) -> str:
+    prefix = build_household_prefix(household_code, poverty_status, row.name, row.id_num)
+    safe_name = f"{prefix}{PDF_EXTENSION}"[:FILENAME_MAX_LENGTH]
+    return store_file(db, spooled, safe_name, PDF_CONTENT_TYPE, collector_id)
+
+
+def check_commit_row(
+    row: schemas.DataCollectionCommitRow, pdf_keys: Container[str]
+) -> str | None:
+    """Return why ``row`` cannot be committed, or None."""
+    if not parse_poverty_status(row.classified_after_check):
+        return "Invalid poverty status"
+    if row.date_check and not parse_date(row.date_check):
+        return "Invalid date format"
+    if row.pdf_url and normalize_filename_key(Path(row.pdf_url).name) not in pdf_keys:
+        return "Missing PDF file"
+    return None
+
+
+def insert_commit_chunk(
+    db: Session,
+    chunk: list[schemas.DataCollectionCommitRow],
+    pdf_lookup: dict[str, PdfSource],
+    collector_id: int,
+    ip_address: str | None,
+) -> list[tuple[int, str]]:
+    """Insert one chunk of rows with executemany and return (household id, code) per row.
+
+    Each PDF is written once per chunk, however many rows attach it; the
+    caller commits or rolls back.
+    """
+    codes = allocate_household_codes(db, len(chunk))
+    spooled_pdfs: dict[str, SpooledBlob] = {}
+    try:
+        households: list[dict[str, Any]] = []
+        for row, household_code in zip(chunk, codes):
+            poverty_status = parse_poverty_status(row.classified_after_check)
+            attachment_url = None
+            if row.pdf_url:
+                pdf_key = normalize_filename_key(Path(row.pdf_url).name)
+                if pdf_key not in spooled_pdfs:
+                    spooled_pdfs[pdf_key] = spool_pdf(pdf_lookup[pdf_key])
+                attachment_url = store_commit_pdf(
+                    db, spooled_pdfs[pdf_key], row, household_code, poverty_status, collector_id
+                )
+            households.append(build_commit_household(row, household_code, poverty_status, attachment_url))
+        db.execute(insert(models.Household), households)
+        household_ids = dict(
+            db.query(models.Household.household_code, models.Household.id).filter(
+                models.Household.household_code.in_(codes)
+            )
+        )
+        db.execute(
+            insert(models.DataCollection),
+            [
+                {
+                    "household_id": household_ids[household_code],
+                    "collector_id": collector_id,
+                    "status": CollectionStatus.SUBMITTED,
+                    "notes": build_commit_notes(row),
+                    "collected_at": parse_date(row.date_check),
+                }
+                for row, household_code in zip(chunk, codes)
+            ],
+        )
+        db.execute(
+            insert(models.ActivityLog),
+            [
+                {
+                    "user_id": collector_id,
+                    "household_id": household_ids[household_code],
+                    "action": "create_household",
+                    "entity_type": "household",
+                    "entity_id": household_ids[household_code],
+                    "detail": "Household imported",
+                    "ip_address": ip_address,
+                }
+                for household_code in codes
+            ],
+        )
+    finally:
+        for spooled in spooled_pdfs.values():
+            spooled.discard()
+    return [(household_ids[household_code], household_code) for household_code in codes]
+
+
 @router.post("/commit", response_model=schemas.HouseholdRead, status_code=status.HTTP_201_CREATED)
 def commit_data_collection_row(
     name: str = Form(...),
@@ -379,6 +720,30 @@ def commit_data_collection_row(
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
 ) -> models.Household:
+    row = schemas.DataCollectionCommitRow(
+        name=name,
+        dob=dob,
+        gender=gender,
+        ethnic=ethnic,
+        address_line=address_line,
+        id_num=id_num,
+        family_mem=family_mem,
+        classified_before_check=classified_before_check,
+        b1_score=b1_score,
+        b2_score=b2_score,
+        income_per_capita=income_per_capita,
+        classified_after_check=classified_after_check,
+        area=area,
+        description=description,
+        note=note,
+        pdf_url=pdf_url,
+        province=province,
+        district=district,
+        commune=commune,
+        village=village,
+        date_check=date_check,
+        official_check=official_check,
+    )
     existing = db.query(models.Household).filter(models.Household.id_card == id_num).first()
     if existing:
         raise HTTPException(
@@ -397,8 +762,8 @@ def commit_data_collection_row(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid date format",
         )
-    birth_date = parse_date(dob)
 
+    household_code = generate_household_code(db)
     attachment_url = None
     if pdf_url:
         if not pdf_file:
@@ -411,52 +776,25 @@ def commit_data_collection_row(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Only PDF files are allowed",
             )
-        settings = get_settings()
-        target_dir = Path(settings.upload_dir) / PDF_SUBDIR
-        household_code = generate_household_code(db)
-        prefix = build_household_prefix(household_code, poverty_status, name, id_num)
-        extension = Path(pdf_file.filename or "").suffix or ".pdf"
-        raw_name = f"{prefix}{extension}"
-        safe_name = raw_name[:FILENAME_MAX_LENGTH]
-        file_path = ensure_unique_path(target_dir, safe_name)
-        save_upload_file(pdf_file, file_path)
-        attachment_url = f"/files/{PDF_SUBDIR}/{quote(file_path.name)}"
-    else:
-        household_code = generate_household_code(db)
+        spooled = spool_pdf(pdf_file)
+        try:
+            attachment_url = store_commit_pdf(
+                db, spooled, row, household_code, poverty_status, current_user.id
+            )
+        finally:
+            spooled.discard()
 
     household = models.Household(
-        household_code=household_code,
-        head_name=normalize_text(name),
-        birth_date=birth_date.date() if birth_date else None,
-        gender=normalize_text(gender) or None,
-        ethnicity=normalize_text(ethnic) or None,
-        id_card=normalize_text(id_num) or None,
-        members_count=family_mem,
-        income_per_capita=income_per_capita,
-        poverty_status=poverty_status,
-        score_b1=b1_score,
-        score_b2=b2_score,
-        note=normalize_text(description) or None,
-        remark=normalize_text(note) or None,
-        area=normalize_text(area) or None,
-        village=normalize_text(village) or None,
-        officer=normalize_text(official_check) or None,
-        commune=normalize_text(commune) or "Chưa rõ",
-        province=normalize_text(province) or "Chưa rõ",
-        district=normalize_text(district) or "Chưa rõ",
-        address_line=normalize_text(address_line) or None,
-        attachment_url=attachment_url,
-        last_surveyed_at=collected_at.date() if collected_at else None,
+        **build_commit_household(row, household_code, poverty_status, attachment_url)
     )
     db.add(household)
     db.flush()
 
-    notes = f"Before: {normalize_text(classified_before_check)}; After: {normalize_text(classified_after_check)}"
     collection = models.DataCollection(
         household_id=household.id,
         collector_id=current_user.id,
         status=CollectionStatus.SUBMITTED,
-        notes=notes,
+        notes=build_commit_notes(row),
         collected_at=collected_at,
     )
     db.add(collection)
@@ -465,12 +803,165 @@ def commit_data_collection_row(
     return household
 
 
+def parse_commit_rows(rows: str) -> list[schemas.DataCollectionCommitRow]:
+    try:
+        return COMMIT_ROWS_ADAPTER.validate_json(rows)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors())
+
+
+def commit_rows(
+    db: Session,
+    payload: list[schemas.DataCollectionCommitRow],
+    pdf_lookup: dict[str, PdfSource],
+    collector_id: int,
+    ip_address: str | None,
+    progress: JobProgress | None = None,
+) -> schemas.DataCollectionBulkCommitResult:
+    results: list[schemas.DataCollectionCommitRowResult] = [
+        schemas.DataCollectionCommitRowResult(
+            row=row.row if row.row is not None else position,
+            created=False,
+        )
+        for position, row in enumerate(payload, start=1)
+    ]
+    if progress:
+        progress.set_total(len(payload))
+    existing_id_cards = find_existing_id_cards(
+        db, {normalize_text(row.id_num) for row in payload} - {""}
+    )
+    seen_id_cards: set[str] = set()
+    pending: list[int] = []
+    for position, row in enumerate(payload):
+        error = check_commit_row(row, pdf_lookup)
+        id_card = normalize_text(row.id_num)
+        if error is None and id_card and (id_card in existing_id_cards or id_card in seen_id_cards):
+            error = "Household already exists"
+        if error:
+            results[position].error = error
+            continue
+        if id_card:
+            seen_id_cards.add(id_card)
+        pending.append(position)
+    if progress:
+        rejected = len(payload) - len(pending)
+        progress.advance(rejected, failed=rejected)
+
+    chunk_size = max(1, get_settings().data_commit_chunk_size)
+    for start in range(0, len(pending), chunk_size):
+        positions = pending[start : start + chunk_size]
+        try:
+            chunk = [payload[position] for position in positions]
+            inserted = insert_commit_chunk(db, chunk, pdf_lookup, collector_id, ip_address)
+            db.commit()
+        except (SQLAlchemyError, OSError):
+            db.rollback()
+            for position in positions:
+                results[position].error = "Commit failed"
+            if progress:
+                progress.advance(len(positions), failed=len(positions))
+            continue
+        for position, (household_id, household_code) in zip(positions, inserted):
+            result = results[position]
+            result.created = True
+            result.household_id = household_id
+            result.household_code = household_code
+        if progress:
+            progress.advance(len(positions))
+
+    created = sum(1 for result in results if result.created)
+    return schemas.DataCollectionBulkCommitResult(
+        created=created,
+        failed=len(results) - created,
+        results=results,
+    )
+
+
+@router.post("/commit/bulk", response_model=schemas.DataCollectionBulkCommitResult)
+def commit_data_collection_rows(
+    request: Request,
+    rows: str = Form(...),
+    pdf_files: list[UploadFile] | None = File(None),
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+) -> schemas.DataCollectionBulkCommitResult:
+    """Commit a validated batch in one request.
+
+    ``rows`` is a JSON array of DataCollectionCommitRow; PDFs are matched to
+    ``pdf_url`` by file name, as in /upload. Rows are inserted in chunks of
+    DATA_COMMIT_CHUNK_SIZE, each in its own transaction, and every row gets a
+    result: a failing chunk is rolled back and its rows reported as failed.
+    """
+    payload = parse_commit_rows(rows)
+    pdf_lookup = build_pdf_lookup(pdf_files)
+    ip_address = request.client.host if request.client else None
+    return commit_rows(db, payload, pdf_lookup, current_user.id, ip_address)
+
+
+def run_commit_job(
+    db: Session,
+    progress: JobProgress,
+    payload: list[schemas.DataCollectionCommitRow],
+    pdf_paths: dict[str, str],
+    collector_id: int,
+    ip_address: str | None,
+) -> dict[str, Any]:
+    pdf_lookup: dict[str, PdfSource] = {key: Path(path) for key, path in pdf_paths.items()}
+    result = commit_rows(db, payload, pdf_lookup, collector_id, ip_address, progress)
+    return result.model_dump(mode="json")
+
+
+@router.post(
+    "/commit/bulk/jobs", response_model=schemas.JobRead, status_code=status.HTTP_202_ACCEPTED
+)
+def commit_data_collection_rows_job(
+    request: Request,
+    response: Response,
+    rows: str = Form(...),
+    pdf_files: list[UploadFile] | None = File(None),
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+) -> models.Job:
+    """Commit like /commit/bulk in a background job; poll /jobs/{id} for the result."""
+    payload = parse_commit_rows(rows)
+    pdf_lookup = build_pdf_lookup(pdf_files)
+    ip_address = request.client.host if request.client else None
+    job_id = new_job_id()
+    job_dir = get_job_dir(job_id)
+    try:
+        pdf_paths: dict[str, str] = {}
+        for index, (key, pdf_file) in enumerate(pdf_lookup.items()):
+            pdf_dir = job_dir / str(index)
+            pdf_dir.mkdir(parents=True, exist_ok=True)
+            pdf_path = pdf_dir / Path(pdf_file.filename).name
+            save_upload_file(pdf_file, pdf_path)
+            pdf_paths[key] = str(pdf_path)
+        job = submit_job(
+            db,
+            job_id,
+            current_user.id,
+            JobKind.DATA_COLLECTION_COMMIT,
+            run_commit_job,
+            payload,
+            pdf_paths,
+            current_user.id,
+            ip_address,
+        )
+    except BaseException:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job
+
+
 @router.get("", response_model=list[schemas.DataCollectionRead])
 def list_data_collections(
+    response: Response,
     household_id: int | None = None,
     status_filter: CollectionStatus | None = None,
     skip: int = 0,
     limit: int = Query(DEFAULT_PAGE_LIMIT, le=MAX_PAGE_LIMIT),
+    cursor: str | None = None,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
 ) -> list[models.DataCollection]:
@@ -479,7 +970,16 @@ def list_data_collections(
         query = query.filter(models.DataCollection.household_id == household_id)
     if status_filter:
         query = query.filter(models.DataCollection.status == status_filter)
-    return query.order_by(models.DataCollection.created_at.desc()).offset(skip).limit(limit).all()
+    keys = [models.DataCollection.created_at, models.DataCollection.id]
+    query = apply_keyset(query, keys, cursor, limit)
+    if not cursor:
+        query = query.offset(skip)
+    collections, next_cursor = split_page(
+        query.all(), limit, lambda collection: (collection.created_at, collection.id)
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return collections
 
 
 @router.post("", response_model=schemas.DataCollectionRead, status_code=status.HTTP_201_CREATED)
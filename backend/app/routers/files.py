@@ -3,11 +3,21 @@ from pathlib import Path
 from urllib.parse import quote
 
 import aiofiles
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse
+from sqlalchemy.orm import Session
 
+from .. import models
 from ..config import get_settings
-from ..deps import get_current_user
+from ..deps import get_current_user, get_db
+from ..utils.blob_store import (
+    BlobTooLargeError,
+    SpooledBlob,
+    parse_blob_url,
+    spool_upload,
+    store_file,
+)
 from ..utils.file_naming import (
     FILENAME_MAX_LENGTH,
     FILENAME_SEPARATOR,
@@ -26,9 +36,6 @@ EDITOR_IMAGE_MAX_SIZE_BYTES = 5 * 1024 * 1024
 ENTITY_POLICY = "policy"
 ENTITY_HOUSEHOLD = "household"
 ALLOWED_ENTITIES = {ENTITY_POLICY, ENTITY_HOUSEHOLD}
-HOUSEHOLD_SUBDIR = "households"
-POLICY_ATTACHMENTS_SUBDIR = "policies/attachments"
-POLICY_CONTENT_SUBDIR = "policies/content"
 ALLOWED_EDITOR_IMAGE_TYPES = {"image/png", "image/jpeg", "image/webp"}
 ALLOWED_POLICY_ATTACHMENT_TYPES = {
     "application/pdf",
@@ -46,6 +53,23 @@ DRAFT_ATTACHMENT_TYPES = {
 DRAFTS_SUBDIR = "drafts"
 DRAFTS_POLICY_IMAGES_SUBDIR = "policies/images"
 DRAFTS_POLICY_ATTACHMENTS_SUBDIR = "policies/attachments"
+FILE_SERVING_ACCEL = "accel"
+ACCEL_REDIRECT_HEADER = "X-Accel-Redirect"
+# Blob names are content hashes, so a URL never changes what it points to.
+BLOB_CACHE_CONTROL = "public, max-age=31536000, immutable"
+FILE_CACHE_CONTROL = "public, max-age=3600"
+
+
+def save_upload(
+    db: Session, spooled: SpooledBlob, filename: str, content_type: str | None, user_id: int
+) -> str:
+    """Store a spooled upload and commit; sync DB and file work, run off the event loop."""
+    try:
+        url = store_file(db, spooled, filename, content_type, user_id, reference=False)
+        db.commit()
+    finally:
+        spooled.discard()
+    return url
 
 
 @router.post("/upload")
@@ -57,6 +81,7 @@ async def upload_file(
     poverty_status: str | None = Form(None),
     head_name: str | None = Form(None),
     id_card: str | None = Form(None),
+    db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
     normalized_entity = (entity_type or ENTITY_POLICY).strip().lower()
@@ -76,39 +101,22 @@ async def upload_file(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=error_message,
         )
-    subdir = HOUSEHOLD_SUBDIR if normalized_entity == ENTITY_HOUSEHOLD else POLICY_ATTACHMENTS_SUBDIR
-    target_dir = UPLOAD_DIR / subdir
-    target_dir.mkdir(parents=True, exist_ok=True)
     extension = Path(file.filename).suffix or ""
-    random_suffix = uuid.uuid4().hex
     if normalized_entity == ENTITY_HOUSEHOLD:
         prefix = build_household_prefix(household_code, poverty_status, head_name, id_card)
-        raw_name = f"{prefix}{extension}" if prefix else f"{random_suffix}{extension}"
     else:
-        category_label = translate_policy_category(policy_category)
-        category_slug = slugify_filename(category_label)
-        prefix = category_slug or ""
-        raw_name = f"{prefix}{FILENAME_SEPARATOR}{random_suffix}{extension}" if prefix else f"{random_suffix}{extension}"
+        prefix = slugify_filename(translate_policy_category(policy_category))
+        if prefix:
+            prefix = f"{prefix}{FILENAME_SEPARATOR}{slugify_filename(Path(file.filename).stem)}"
+    raw_name = f"{prefix}{extension}" if prefix else file.filename
     safe_name = raw_name[:FILENAME_MAX_LENGTH]
-    file_path = target_dir / safe_name
-    if normalized_entity == ENTITY_HOUSEHOLD:
-        counter = 1
-        stem = Path(safe_name).stem
-        while file_path.exists():
-            candidate = f"{stem}{FILENAME_SEPARATOR}{counter}{extension}"
-            safe_name = candidate[:FILENAME_MAX_LENGTH]
-            file_path = target_dir / safe_name
-            counter += 1
-    async with aiofiles.open(file_path, "wb") as out_file:
-        while True:
-            chunk = await file.read(UPLOAD_CHUNK_SIZE)
-            if not chunk:
-                break
-            await out_file.write(chunk)
-    encoded_name = quote(safe_name)
+    spooled = await spool_upload(file)
+    url = await run_in_threadpool(
+        save_upload, db, spooled, safe_name, file.content_type, current_user.id
+    )
     return JSONResponse(
         {
-            "url": f"/files/{subdir}/{encoded_name}",
+            "url": url,
             "filename": file.filename,
             "stored_as": safe_name,
         }
@@ -118,6 +126,7 @@ async def upload_file(
 @router.post("/upload-article")
 async def upload_article_image(
     file: UploadFile = File(...),  # noqa: B008
+    db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
     if file.content_type not in ALLOWED_EDITOR_IMAGE_TYPES:
@@ -125,32 +134,20 @@ async def upload_article_image(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Only PNG, JPG, or WEBP images are allowed",
         )
-    target_dir = UPLOAD_DIR / POLICY_CONTENT_SUBDIR
-    target_dir.mkdir(parents=True, exist_ok=True)
-    extension = Path(file.filename).suffix or ""
-    safe_name = f"{uuid.uuid4().hex}{extension}"
-    file_path = target_dir / safe_name
-    total_size = 0
-    async with aiofiles.open(file_path, "wb") as out_file:
-        while True:
-            chunk = await file.read(UPLOAD_CHUNK_SIZE)
-            if not chunk:
-                break
-            total_size += len(chunk)
-            if total_size > EDITOR_IMAGE_MAX_SIZE_BYTES:
-                await out_file.close()
-                if file_path.exists():
-                    file_path.unlink(missing_ok=True)
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Image exceeds size limit",
-                )
-            await out_file.write(chunk)
-    encoded_name = quote(safe_name)
+    try:
+        spooled = await spool_upload(file, EDITOR_IMAGE_MAX_SIZE_BYTES)
+    except BlobTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Image exceeds size limit",
+        )
+    url = await run_in_threadpool(
+        save_upload, db, spooled, file.filename or "", file.content_type, current_user.id
+    )
     return JSONResponse(
         {
             "success": 1,
-            "file": {"url": f"/files/{POLICY_CONTENT_SUBDIR}/{encoded_name}"},
+            "file": {"url": url},
         }
     )
 
@@ -202,3 +199,51 @@ async def upload_draft_file(
             "stored_as": safe_name,
         }
     )
+
+
+def resolve_upload_path(file_path: str) -> Path | None:
+    """Map a /files path onto UPLOAD_DIR, refusing traversal and hidden entries."""
+    relative = Path(file_path)
+    if relative.is_absolute() or not relative.parts:
+        return None
+    if any(part.startswith(".") for part in relative.parts):
+        return None
+    path = UPLOAD_DIR / relative
+    if not path.resolve().is_relative_to(UPLOAD_DIR.resolve()) or not path.is_file():
+        return None
+    return path
+
+
+def get_stored_filename(db: Session, digest: str) -> str | None:
+    return (
+        db.query(models.StoredFile.filename)
+        .filter(models.StoredFile.blob_hash == digest)
+        .order_by(models.StoredFile.id)
+        .limit(1)
+        .scalar()
+    )
+
+
+@router.api_route("/{file_path:path}", methods=["GET", "HEAD"])
+def serve_file(file_path: str, db: Session = Depends(get_db)) -> Response:
+    """Serve an uploaded file, or with FILE_SERVING_MODE=accel let nginx send it.
+
+    In accel mode the response has no body: nginx follows X-Accel-Redirect to
+    its internal location and handles ranges and conditional requests there.
+    """
+    path = resolve_upload_path(file_path)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    relative_path = path.relative_to(UPLOAD_DIR).as_posix()
+    headers = {"Cache-Control": FILE_CACHE_CONTROL}
+    digest = parse_blob_url(f"/files/{relative_path}")
+    if digest:
+        headers["Cache-Control"] = BLOB_CACHE_CONTROL
+        filename = get_stored_filename(db, digest)
+        if filename:
+            headers["Content-Disposition"] = f"inline; filename*=utf-8''{quote(filename)}"
+    if settings.file_serving_mode == FILE_SERVING_ACCEL:
+        prefix = settings.file_accel_prefix.rstrip("/")
+        headers[ACCEL_REDIRECT_HEADER] = f"{prefix}/{quote(relative_path)}"
+        return Response(headers=headers)
+    return FileResponse(path, headers=headers)
@@ -1,72 +1,88 @@
-import csv
-import json
-from pathlib import Path
+import math
+import struct
+import sys
+from array import array
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+
+from ..utils.cache import LRUCache
+from ..utils.geo_layer import (
+    GEOJSON_FILES,
+    SHAPE_ZOOM_LEVELS,
+    SHAPES_FORMAT_VERSION,
+    GeoLayer,
+    get_geo_layer,
+    load_layer_shapes,
+)
+from ..utils.geometry import zoom_level
+from ..utils.http_cache import (
+    EncodedBody,
+    encode_json,
+    encoded_response,
+    estimate_encoded_size,
+    make_etag,
+    not_modified_response,
+)
+from ..utils.indicator_store import IndicatorStore, get_indicator_store
 
 router = APIRouter(prefix="/gis", tags=["gis"])
 
-GEOJSON_FILES = {
-    "old_63": "Việt Nam (tỉnh thành) - 63.geojson",
-    "new_34": "Việt Nam (tỉnh thành) - 34.geojson",
-}
-DATA_FILE = "gis_indicator_values.csv"
 DEFAULT_GEO_VERSION = "old_63"
-CACHE_MAX_ENTRIES = 50
-CACHE: dict[str, dict[str, Any]] = {}
-CACHE_ORDER: list[str] = []
-
-
-def get_repo_root() -> Path:
-    here = Path(__file__).resolve()
-    for parent in here.parents:
-        if (parent / "FE" / "data").exists():
-            return parent
-    return here.parents[2]
-
-
-def load_geojson(geo_version: str) -> dict[str, Any]:
-    filename = GEOJSON_FILES.get(geo_version)
-    if not filename:
+DEFAULT_ZOOM = 6
+MIN_YEAR = 1900
+MAX_YEAR = 2100
+BATCH_MAX_SERIES = 500
+BATCH_FORMAT_JSON = "json"
+BATCH_FORMAT_BINARY = "binary"
+BINARY_MEDIA_TYPE = "application/octet-stream"
+CACHE_MAX_ENTRIES = 2048
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE = LRUCache(max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES)
+BODY_CACHE_MAX_ENTRIES = 256
+BODY_CACHE_MAX_BYTES = 128 * 1024 * 1024
+BODY_CACHE = LRUCache(
+    max_entries=BODY_CACHE_MAX_ENTRIES,
+    max_bytes=BODY_CACHE_MAX_BYTES,
+    sizeof=estimate_encoded_size,
+)
+
+ValueMap = dict[str, tuple[float, str, str, int]]
+Series = tuple[str, str | None, int]
+
+
+def load_geo_layer(geo_version: str) -> GeoLayer:
+    if geo_version not in GEOJSON_FILES:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid geo_version")
-    path = get_repo_root() / "FE" / "data" / filename
-    if not path.exists():
+    try:
+        return get_geo_layer(geo_version)
+    except FileNotFoundError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="GeoJSON not found")
-    with path.open(encoding="utf-8") as handle:
-        return json.load(handle)
+
+
+def load_store() -> IndicatorStore:
+    try:
+        return get_indicator_store()
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="GIS dataset not found")
 
 
 def load_indicator_rows(
+    store: IndicatorStore,
     indicator_code: str,
     year: int,
     geo_version: str,
     metric: str | None,
-) -> dict[str, dict[str, Any]]:
-    path = get_repo_root() / "FE" / "data" / "processed" / DATA_FILE
-    if not path.exists():
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="GIS dataset not found")
-
-    records: dict[str, dict[str, Any]] = {}
+) -> dict[str, int]:
+    records: dict[str, int] = {}
     multi_metric = False
-    with path.open(encoding="utf-8-sig") as handle:
-        reader = csv.DictReader(handle)
-        for row in reader:
-            if row.get("indicator_code") != indicator_code:
-                continue
-            if row.get("geo_version") != geo_version:
-                continue
-            if str(row.get("year")) != str(year):
-                continue
-            row_metric = row.get("metric") or ""
-            if metric and row_metric != metric:
-                continue
-            geo_code = row.get("geo_code") or ""
-            if not geo_code:
-                continue
-            if geo_code in records and row_metric:
-                multi_metric = True
-            records[geo_code] = row
+    for position in store.select(indicator_code, geo_version, metric=metric, year=year):
+        geo_code = store.geo_code_at(position)
+        if not geo_code:
+            continue
+        if geo_code in records and store.metric_at(position):
+            multi_metric = True
+        records[geo_code] = position
 
     if not metric and multi_metric:
         raise HTTPException(
@@ -76,62 +92,190 @@ def load_indicator_rows(
     return records
 
 
-def cache_get(key: str) -> dict[str, Any] | None:
-    return CACHE.get(key)
+def build_value_map(
+    store: IndicatorStore,
+    indicator: str,
+    year: int,
+    geo_version: str,
+    metric: str | None,
+) -> ValueMap:
+    rows = load_indicator_rows(store, indicator, year, geo_version, metric)
+    return {
+        geo_code: (
+            store.value_at(position),
+            store.indicator_at(position),
+            store.metric_at(position),
+            store.year_at(position),
+        )
+        for geo_code, position in rows.items()
+    }
 
 
-def cache_set(key: str, value: dict[str, Any]) -> None:
-    if key in CACHE:
-        return
-    CACHE[key] = value
-    CACHE_ORDER.append(key)
-    if len(CACHE_ORDER) > CACHE_MAX_ENTRIES:
-        oldest = CACHE_ORDER.pop(0)
-        CACHE.pop(oldest, None)
+def load_value_map(
+    store: IndicatorStore,
+    indicator: str,
+    year: int,
+    geo_version: str,
+    metric: str | None,
+) -> ValueMap:
+    cache_key = ("values", store.version, indicator, year, geo_version, metric or "")
+    return CACHE.get_or_set(
+        cache_key,
+        lambda: build_value_map(store, indicator, year, geo_version, metric),
+    )
+
+
+def build_geojson(
+    layer: GeoLayer,
+    values: ValueMap,
+    indicator: str,
+    year: int,
+    metric: str | None,
+) -> bytes:
+    properties: list[dict[str, Any]] = []
+    for feature in layer.features:
+        props = dict(feature.properties)
+        record = values.get(feature.geo_code)
+        if record is not None:
+            props["value"], props["indicator"], props["metric"], props["year"] = record
+        else:
+            props["value"] = None
+            props["indicator"] = indicator
+            props["metric"] = metric
+            props["year"] = year
+        properties.append(props)
+    return layer.encode(properties)
 
 
-@router.get("/indicators")
-def list_indicators() -> list[dict[str, Any]]:
-    path = get_repo_root() / "FE" / "data" / "processed" / DATA_FILE
-    if not path.exists():
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="GIS dataset not found")
+def build_values(
+    values: ValueMap,
+    indicator: str,
+    year: int,
+    geo_version: str,
+    metric: str | None,
+) -> dict[str, Any]:
+    return {
+        "indicator": indicator,
+        "metric": metric,
+        "year": year,
+        "geo_version": geo_version,
+        "values": {geo_code: record[0] for geo_code, record in values.items()},
+    }
+
 
-    indicators: dict[str, dict[str, Any]] = {}
-    with path.open(encoding="utf-8-sig") as handle:
-        reader = csv.DictReader(handle)
-        for row in reader:
-            code = row.get("indicator_code") or ""
-            if not code:
-                continue
-            entry = indicators.setdefault(
-                code,
-                {
-                    "indicator_code": code,
-                    "indicator_title": row.get("indicator_title") or "",
-                    "metrics": set(),
-                    "years": set(),
-                    "geo_versions": set(),
-                },
-            )
-            metric = row.get("metric") or ""
-            year = row.get("year") or ""
-            geo_version = row.get("geo_version") or ""
-            if metric:
-                entry["metrics"].add(metric)
-            if year:
-                entry["years"].add(year)
-            if geo_version:
-                entry["geo_versions"].add(geo_version)
+def load_feature_order(store: IndicatorStore, geo_version: str) -> tuple[str, list[str]]:
+    """Return (GeoJSON hash, geo codes) in GeoJSON feature order.
 
+    Falls back to the dataset's sorted geo codes when the GeoJSON is missing.
+    """
+    if geo_version not in GEOJSON_FILES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid geo_version")
+    try:
+        layer = get_geo_layer(geo_version)
+    except FileNotFoundError:
+        return "", list(store.geo_codes_by_version.get(geo_version, []))
+    return layer.version, layer.geo_codes
+
+
+def resolve_batch_series(
+    store: IndicatorStore,
+    indicators: list[str],
+    metrics: list[str] | None,
+    years: list[int] | None,
+) -> list[Series]:
+    if metrics and len(metrics) not in (1, len(indicators)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide one metric, or one metric per indicator",
+        )
+    if years and any(year < MIN_YEAR or year > MAX_YEAR for year in years):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid year")
+
+    series: list[Series] = []
+    for index, indicator in enumerate(indicators):
+        metric = None
+        if metrics:
+            metric = (metrics[0] if len(metrics) == 1 else metrics[index]) or None
+        if years:
+            indicator_years = years
+        else:
+            summary = store.summaries.get(indicator)
+            indicator_years = summary.years if summary else []
+        series.extend((indicator, metric, year) for year in indicator_years)
+
+    if len(series) > BATCH_MAX_SERIES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Too many series requested")
+    return series
+
+
+def build_batch_rows(
+    store: IndicatorStore,
+    geo_version: str,
+    geo_codes: list[str],
+    series: list[Series],
+) -> list[list[float | None]]:
+    rows: list[list[float | None]] = []
+    for indicator, metric, year in series:
+        values = load_value_map(store, indicator, year, geo_version, metric)
+        rows.append([values[code][0] if code in values else None for code in geo_codes])
+    return rows
+
+
+def build_batch_header(geo_version: str, geo_codes: list[str], series: list[Series]) -> dict[str, Any]:
+    return {
+        "geo_version": geo_version,
+        "geo_codes": geo_codes,
+        "series": [
+            {"indicator": indicator, "metric": metric, "year": year}
+            for indicator, metric, year in series
+        ],
+    }
+
+
+def encode_batch_json(
+    geo_version: str,
+    geo_codes: list[str],
+    series: list[Series],
+    rows: list[list[float | None]],
+) -> bytes:
+    payload = build_batch_header(geo_version, geo_codes, series)
+    for item, row in zip(payload["series"], rows):
+        item["values"] = row
+    return encode_json(payload)
+
+
+def encode_batch_binary(
+    geo_version: str,
+    geo_codes: list[str],
+    series: list[Series],
+    rows: list[list[float | None]],
+) -> bytes:
+    """Pack rows for a JS ``Float32Array``.
+
+    Layout: uint32 little-endian header length, the JSON header (the JSON
+    response without "values", space-padded so the data is 4-byte aligned),
+    then one float32 row per series, little-endian, NaN where there is no value.
+    """
+    header = encode_json(build_batch_header(geo_version, geo_codes, series))
+    header += b" " * (-(len(header) + 4) % 4)
+    data = array("f", (math.nan if value is None else value for row in rows for value in row))
+    if sys.byteorder != "little":
+        data.byteswap()
+    return struct.pack("<I", len(header)) + header + data.tobytes()
+
+
+@router.get("/indicators")
+def list_indicators() -> list[dict[str, Any]]:
+    store = load_store()
     result: list[dict[str, Any]] = []
-    for item in indicators.values():
+    for summary in store.summaries.values():
         result.append(
             {
-                "indicator_code": item["indicator_code"],
-                "indicator_title": item["indicator_title"],
-                "metrics": sorted(item["metrics"]),
-                "years": sorted(item["years"]),
-                "geo_versions": sorted(item["geo_versions"]),
+                "indicator_code": summary.indicator_code,
+                "indicator_title": summary.indicator_title,
+                "metrics": list(summary.metrics),
+                "years": [str(year) for year in summary.years],
+                "geo_versions": list(summary.geo_versions),
             }
         )
     return sorted(result, key=lambda x: x["indicator_code"])
@@ -139,108 +283,121 @@ def list_indicators() -> list[dict[str, Any]]:
 
 @router.get("/indicators/{indicator_code}/metrics")
 def list_indicator_metrics(indicator_code: str) -> dict[str, Any]:
-    path = get_repo_root() / "FE" / "data" / "processed" / DATA_FILE
-    if not path.exists():
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="GIS dataset not found")
-
-    metrics: set[str] = set()
-    years: set[str] = set()
-    geo_versions: set[str] = set()
-    indicator_title = ""
-
-    with path.open(encoding="utf-8-sig") as handle:
-        reader = csv.DictReader(handle)
-        for row in reader:
-            if row.get("indicator_code") != indicator_code:
-                continue
-            if not indicator_title:
-                indicator_title = row.get("indicator_title") or ""
-            metric = row.get("metric") or ""
-            year = row.get("year") or ""
-            geo_version = row.get("geo_version") or ""
-            if metric:
-                metrics.add(metric)
-            if year:
-                years.add(year)
-            if geo_version:
-                geo_versions.add(geo_version)
-
-    if not metrics and not years and not geo_versions:
+    store = load_store()
+    summary = store.summaries.get(indicator_code)
+    if summary is None or (not summary.metrics and not summary.years and not summary.geo_versions):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Indicator not found")
 
-    metrics_sorted = sorted(metrics)
     return {
         "indicator_code": indicator_code,
-        "indicator_title": indicator_title,
-        "metrics": metrics_sorted,
-        "default_metric": metrics_sorted[0] if metrics_sorted else None,
-        "years": sorted(years),
-        "geo_versions": sorted(geo_versions),
+        "indicator_title": summary.indicator_title,
+        "metrics": list(summary.metrics),
+        "default_metric": summary.metrics[0] if summary.metrics else None,
+        "years": [str(year) for year in summary.years],
+        "geo_versions": list(summary.geo_versions),
     }
 
 
 @router.get("/geojson")
 def get_geojson(
+    request: Request,
     indicator: str = Query(..., min_length=1),
     year: int = Query(..., ge=1900, le=2100),
     geo_version: str = Query(DEFAULT_GEO_VERSION),
     metric: str | None = Query(None),
-) -> dict[str, Any]:
-    cache_key = f"{indicator}:{year}:{geo_version}:{metric or ''}"
-    cached = cache_get(cache_key)
-    if cached:
-        return cached
-
-    geojson = load_geojson(geo_version)
-    rows = load_indicator_rows(indicator, year, geo_version, metric)
-    for feature in geojson.get("features", []):
-        props = feature.get("properties", {})
-        geo_code = str(props.get("ma_tinh") or "")
-        record = rows.get(geo_code)
-        if record:
-            props["value"] = float(record.get("value"))
-            props["indicator"] = record.get("indicator_code")
-            props["metric"] = record.get("metric")
-            props["year"] = int(record.get("year"))
-        else:
-            props["value"] = None
-            props["indicator"] = indicator
-            props["metric"] = metric
-            props["year"] = year
-        feature["properties"] = props
-    cache_set(cache_key, geojson)
-    return geojson
+) -> Response:
+    store = load_store()
+    layer = load_geo_layer(geo_version)
+    params = (indicator, year, geo_version, metric or "")
+    etag = make_etag("geojson", store.version, layer.version, *params)
+    not_modified = not_modified_response(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    def build() -> EncodedBody:
+        values = load_value_map(store, indicator, year, geo_version, metric)
+        return EncodedBody(build_geojson(layer, values, indicator, year, metric), etag)
+
+    body = BODY_CACHE.get_or_set(("geojson", store.version, layer.version, *params), build)
+    return encoded_response(request, body)
 
 
 @router.get("/values")
 def get_values(
+    request: Request,
     indicator: str = Query(..., min_length=1),
     year: int = Query(..., ge=1900, le=2100),
     geo_version: str = Query(DEFAULT_GEO_VERSION),
     metric: str | None = Query(None),
-) -> dict[str, Any]:
-    cache_key = f"values:{indicator}:{year}:{geo_version}:{metric or ''}"
-    cached = cache_get(cache_key)
-    if cached:
-        return cached
-
-    rows = load_indicator_rows(indicator, year, geo_version, metric)
-    values: dict[str, float] = {}
-    for geo_code, row in rows.items():
-        raw_value = row.get("value")
-        if raw_value is None:
-            continue
-        try:
-            values[geo_code] = float(raw_value)
-        except (TypeError, ValueError):
-            continue
-
-    payload = {
-        "indicator": indicator,
-        "metric": metric,
-        "year": year,
-        "geo_version": geo_version,
-        "values": values,
-    }
-    cache_set(cache_key, payload)
-    return payload
+) -> Response:
+    store = load_store()
+    params = (indicator, year, geo_version, metric or "")
+    etag = make_etag("values", store.version, *params)
+    not_modified = not_modified_response(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    def build() -> EncodedBody:
+        values = load_value_map(store, indicator, year, geo_version, metric)
+        payload = build_values(values, indicator, year, geo_version, metric)
+        return EncodedBody(encode_json(payload), etag)
+
+    body = BODY_CACHE.get_or_set(("values", store.version, *params), build)
+    return encoded_response(request, body)
+
+
+@router.get("/shapes")
+def get_shapes(
+    request: Request,
+    geo_version: str = Query(DEFAULT_GEO_VERSION),
+    zoom: int = Query(DEFAULT_ZOOM, ge=0, le=22),
+) -> Response:
+    layer = load_geo_layer(geo_version)
+    level = zoom_level(zoom, SHAPE_ZOOM_LEVELS)
+    etag = make_etag("shapes", layer.version, SHAPES_FORMAT_VERSION, level)
+    not_modified = not_modified_response(request, etag)
+    if not_modified is not None:
+        return not_modified
+    body = BODY_CACHE.get_or_set(
+        ("shapes", layer.version, level),
+        lambda: EncodedBody(load_layer_shapes(layer, level), etag),
+    )
+    return encoded_response(request, body)
+
+
+@router.get("/values/batch")
+def get_values_batch(
+    request: Request,
+    indicator: list[str] = Query(..., min_length=1),
+    year: list[int] | None = Query(None),
+    metric: list[str] | None = Query(None),
+    geo_version: str = Query(DEFAULT_GEO_VERSION),
+    output_format: str = Query(
+        BATCH_FORMAT_JSON,
+        alias="format",
+        pattern=f"^({BATCH_FORMAT_JSON}|{BATCH_FORMAT_BINARY})$",
+    ),
+) -> Response:
+    """Values for many (indicator, year) series, as dense arrays aligned to ``geo_codes``.
+
+    Years default to every year of each indicator. ``metric`` is either one
+    value for all indicators or one per indicator, in order.
+    """
+    store = load_store()
+    layer_version, geo_codes = load_feature_order(store, geo_version)
+    series = resolve_batch_series(store, indicator, metric, year)
+    params = (geo_version, output_format, tuple(series))
+    etag = make_etag("values-batch", store.version, layer_version, *params)
+    not_modified = not_modified_response(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    def build() -> EncodedBody:
+        rows = build_batch_rows(store, geo_version, geo_codes, series)
+        if output_format == BATCH_FORMAT_BINARY:
+            data = encode_batch_binary(geo_version, geo_codes, series, rows)
+            return EncodedBody(data, etag, BINARY_MEDIA_TYPE)
+        return EncodedBody(encode_batch_json(geo_version, geo_codes, series, rows), etag)
+
+    body = BODY_CACHE.get_or_set(("values-batch", store.version, layer_version, *params), build)
+    return encoded_response(request, body)
@@ -1,36 +1,54 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import deps, models, schemas
 from ..constants import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, PovertyStatus
 from ..utils.activity_log import log_activity
-from ..utils.household_code import generate_household_code
+from ..utils.blob_store import acquire_file, release_file
+from ..utils.household_code import generate_household_code, observe_household_code
+from ..utils.pagination import apply_keyset, split_page
 
 router = APIRouter(prefix="/households", tags=["households"])
 
 
 @router.get("", response_model=schemas.HouseholdListResponse)
-def list_households(
+async def list_households(
     province: str | None = None,
     district: str | None = None,
     commune: str | None = None,
     status_filter: PovertyStatus | None = None,
     skip: int = 0,
     limit: int = Query(DEFAULT_PAGE_LIMIT, le=MAX_PAGE_LIMIT),
-    db: Session = Depends(deps.get_db),
+    cursor: str | None = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(deps.get_async_db),
 ) -> dict[str, object]:
-    query = db.query(models.Household)
+    """Page by ``skip`` or, faster for deep pages, by the ``next_cursor`` of the previous page.
+
+    ``total`` is only counted for the first page of a cursor walk, and not at
+    all with ``include_total=false``.
+    """
+    query = select(models.Household)
     if province:
-        query = query.filter(models.Household.province == province)
+        query = query.where(models.Household.province == province)
     if district:
-        query = query.filter(models.Household.district == district)
+        query = query.where(models.Household.district == district)
     if commune:
-        query = query.filter(models.Household.commune == commune)
+        query = query.where(models.Household.commune == commune)
     if status_filter:
-        query = query.filter(models.Household.poverty_status == status_filter)
-    total = query.count()
-    households = query.offset(skip).limit(limit).all()
-    return {"items": households, "total": total}
+        query = query.where(models.Household.poverty_status == status_filter)
+    total = None
+    if include_total and not cursor:
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    page = apply_keyset(query, [models.Household.id], cursor, limit, descending=False)
+    if not cursor:
+        page = page.offset(skip)
+    households, next_cursor = split_page(
+        (await db.scalars(page)).all(), limit, lambda household: (household.id,)
+    )
+    return {"items": households, "total": total, "next_cursor": next_cursor}
 
 
 @router.post("", response_model=schemas.HouseholdRead, status_code=status.HTTP_201_CREATED)
@@ -51,11 +69,14 @@ def create_household(
         )
         if duplicate:
             household_code = generate_household_code(db)
+        else:
+            observe_household_code(db, household_code)
     payload_data = payload.model_dump()
     payload_data["household_code"] = household_code
     household = models.Household(**payload_data)
     db.add(household)
     db.flush()
+    acquire_file(db, household.attachment_url)
     log_activity(
         db,
         user_id=current_user.id,
@@ -94,8 +115,14 @@ def update_household(
     household = db.query(models.Household).filter(models.Household.id == household_id).first()
     if not household:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Household not found")
-    for key, value in payload.model_dump(exclude_unset=True).items():
+    updates = payload.model_dump(exclude_unset=True)
+    if "attachment_url" in updates and updates["attachment_url"] != household.attachment_url:
+        acquire_file(db, updates["attachment_url"])
+        release_file(db, household.attachment_url)
+    for key, value in updates.items():
         setattr(household, key, value)
+    if updates.get("household_code"):
+        observe_household_code(db, updates["household_code"])
     log_activity(
         db,
         user_id=current_user.id,
@@ -134,5 +161,6 @@ def delete_household(
         detail="Household removed",
         ip_address=request.client.host if request else None,
     )
+    release_file(db, household.attachment_url)
     db.delete(household)
     db.commit()
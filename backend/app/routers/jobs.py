@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from .. import deps, models, schemas
+from ..constants import JobStatus, Roles
+from ..utils.jobs import get_result_path
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def get_owned_job(db: Session, job_id: str, current_user: models.User) -> models.Job:
+    job = db.get(models.Job, job_id)
+    if not job or (job.user_id != current_user.id and current_user.role != Roles.ADMIN):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}", response_model=schemas.JobRead)
+def get_job(
+    job_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+) -> models.Job:
+    """Poll a background job; once it has succeeded ``result`` holds the summary counts."""
+    return get_owned_job(db, job_id, current_user)
+
+
+@router.get("/{job_id}/result")
+def get_job_result(
+    job_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+) -> FileResponse:
+    """The full result of a succeeded job, including per-row details."""
+    job = get_owned_job(db, job_id, current_user)
+    path = get_result_path(job.id)
+    if job.status != JobStatus.SUCCEEDED or not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job result not found")
+    return FileResponse(path, media_type="application/json")
@@ -1,14 +1,20 @@
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Any, Iterator
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import false, func, select
+from sqlalchemy.dialects.mysql import match
 
 from .. import deps, models, schemas
 from ..constants import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, PolicyCategory
 from ..config import get_settings
 from ..utils.activity_log import log_activity
+from ..utils.blob_store import acquire_file, parse_blob_url, release_file
+from ..utils.pagination import NEXT_CURSOR_HEADER, apply_keyset, split_page
+from ..utils.text import fold_search_text
 
 router = APIRouter(prefix="/policies", tags=["policies"])
 CATEGORY_GROUPS = {
@@ -18,26 +24,44 @@ CATEGORY_GROUPS = {
 DRAFT_RETENTION_DAYS = 30
 DRAFT_DEFAULT_LIMIT = DEFAULT_PAGE_LIMIT
 DRAFT_MAX_LIMIT = 50
+# Matches the server's default ngram_token_size; shorter terms fall back to LIKE.
+FULLTEXT_MIN_TERM_LENGTH = 2
 settings = get_settings()
 
 
-def extract_draft_file_urls(draft: models.PolicyDraft) -> set[str]:
-    urls: set[str] = set()
-    if draft.attachment_url and draft.attachment_url.startswith("/files/drafts/"):
-        urls.add(draft.attachment_url)
-    blocks = draft.content_blocks or {}
-    for block in blocks.get("blocks", []):
+def iter_image_urls(content_blocks: Any) -> Iterator[str]:
+    blocks = content_blocks.get("blocks", []) if isinstance(content_blocks, dict) else []
+    for block in blocks:
         if not isinstance(block, dict):
             continue
         if block.get("type") != "image":
             continue
         file_data = (block.get("data") or {}).get("file") or {}
         url = file_data.get("url")
-        if isinstance(url, str) and url.startswith("/files/drafts/"):
+        if isinstance(url, str):
+            yield url
+
+
+def extract_draft_file_urls(draft: models.PolicyDraft) -> set[str]:
+    urls: set[str] = set()
+    if draft.attachment_url and draft.attachment_url.startswith("/files/drafts/"):
+        urls.add(draft.attachment_url)
+    for url in iter_image_urls(draft.content_blocks):
+        if url.startswith("/files/drafts/"):
             urls.add(url)
     return urls
 
 
+def extract_policy_blob_urls(policy: models.Policy) -> dict[str, str]:
+    """Blob-store files a policy links, by content hash; it holds one reference to each."""
+    urls: dict[str, str] = {}
+    for url in [policy.attachment_url, *iter_image_urls(policy.content_blocks)]:
+        digest = parse_blob_url(url)
+        if digest:
+            urls.setdefault(digest, url)
+    return urls
+
+
 def cleanup_old_drafts(db: Session) -> None:
     cutoff = datetime.utcnow() - timedelta(days=DRAFT_RETENTION_DAYS)
     old_drafts = db.query(models.PolicyDraft).filter(models.PolicyDraft.updated_at < cutoff).all()
@@ -57,45 +81,85 @@ def cleanup_old_drafts(db: Session) -> None:
 
 @router.get("", response_model=list[schemas.PolicyRead])
 def list_policies(
+    response: Response,
     category: PolicyCategory | None = None,
     skip: int = 0,
     limit: int = Query(DEFAULT_PAGE_LIMIT, le=MAX_PAGE_LIMIT),
+    cursor: str | None = None,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
 ) -> list[models.Policy]:
     query = db.query(models.Policy)
     if category:
         query = query.filter(models.Policy.category == category)
-    return query.offset(skip).limit(limit).all()
+    query = apply_keyset(query, [models.Policy.id], cursor, limit, descending=False)
+    if not cursor:
+        query = query.offset(skip)
+    policies, next_cursor = split_page(query.all(), limit, lambda policy: (policy.id,))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return policies
 
 
 @router.get("/public", response_model=list[schemas.PolicyRead])
-def list_public_policies(
+async def list_public_policies(
+    response: Response,
     category: PolicyCategory | None = None,
     category_group: str | None = None,
     q: str | None = Query(None, min_length=1),
     skip: int = 0,
     limit: int = Query(DEFAULT_PAGE_LIMIT, le=MAX_PAGE_LIMIT),
-    db: Session = Depends(deps.get_db),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(deps.get_async_db),
 ) -> list[models.Policy]:
-    query = db.query(models.Policy).filter(models.Policy.is_public.is_(True))
+    """``q`` is matched without diacritics against the folded ``search_text``.
+
+    On MySQL the FULLTEXT index answers it and results are ranked by
+    relevance; elsewhere it falls back to LIKE in the usual order.
+    """
+    query = select(models.Policy).where(models.Policy.is_public.is_(True))
     if category_group:
         group = CATEGORY_GROUPS.get(category_group.strip().lower())
         if group:
-            query = query.filter(models.Policy.category.in_(group))
+            query = query.where(models.Policy.category.in_(group))
     elif category:
-        query = query.filter(models.Policy.category == category)
+        query = query.where(models.Policy.category == category)
+    score = None
     if q:
-        keyword = f"%{q.strip()}%"
-        query = query.filter(
-            or_(
-                models.Policy.title.ilike(keyword),
-                models.Policy.summary.ilike(keyword),
-                models.Policy.description.ilike(keyword),
-                models.Policy.issued_by.ilike(keyword),
-            )
+        terms = fold_search_text(q).split()
+        if not terms:
+            query = query.where(false())
+        fulltext_terms = [term for term in terms if len(term) >= FULLTEXT_MIN_TERM_LENGTH]
+        if fulltext_terms and db.bind.dialect.name == "mysql":
+            against = " ".join(f'+"{term}"' for term in fulltext_terms)
+            score = match(models.Policy.search_text, against=against).in_boolean_mode()
+            query = query.where(score).add_columns(score)
+            terms = [term for term in terms if term not in fulltext_terms]
+        for term in terms:
+            query = query.where(models.Policy.search_text.contains(term, autoescape=True))
+    if score is not None:
+        page = apply_keyset(query, [score, models.Policy.id], cursor, limit)
+        if not cursor:
+            page = page.offset(skip)
+        rows, next_cursor = split_page(
+            (await db.execute(page)).all(), limit, lambda row: (row[1], row[0].id)
         )
-    return query.order_by(models.Policy.updated_at.desc(), models.Policy.created_at.desc()).offset(skip).limit(limit).all()
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return [row[0] for row in rows]
+
+    updated_at = func.coalesce(models.Policy.updated_at, models.Policy.created_at)
+    query = apply_keyset(query, [updated_at, models.Policy.id], cursor, limit)
+    if not cursor:
+        query = query.offset(skip)
+    policies, next_cursor = split_page(
+        (await db.scalars(query)).all(),
+        limit,
+        lambda policy: (policy.updated_at or policy.created_at, policy.id),
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return policies
 
 
 @router.get("/public/{policy_id}", response_model=schemas.PolicyRead)
@@ -123,6 +187,8 @@ def create_policy(
     policy = models.Policy(**payload.model_dump())
     db.add(policy)
     db.flush()
+    for url in extract_policy_blob_urls(policy).values():
+        acquire_file(db, url)
     log_activity(
         db,
         user_id=current_user.id,
@@ -268,8 +334,14 @@ def update_policy(
     policy = db.query(models.Policy).filter(models.Policy.id == policy_id).first()
     if not policy:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Policy not found")
+    linked_before = extract_policy_blob_urls(policy)
     for key, value in payload.model_dump(exclude_unset=True).items():
         setattr(policy, key, value)
+    linked_after = extract_policy_blob_urls(policy)
+    for digest in linked_after.keys() - linked_before.keys():
+        acquire_file(db, linked_after[digest])
+    for digest in linked_before.keys() - linked_after.keys():
+        release_file(db, linked_before[digest])
     log_activity(
         db,
         user_id=current_user.id,
@@ -306,5 +378,7 @@ def delete_policy(
         detail="Policy removed",
         ip_address=request.client.host if request else None,
     )
+    for url in extract_policy_blob_urls(policy).values():
+        release_file(db, url)
     db.delete(policy)
     db.commit()
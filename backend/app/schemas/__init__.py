@@ -1,5 +1,5 @@
 from .activity_log import ActivityLogCreate, ActivityLogRead
-from .auth import Token, TokenData, TokenPayload, UserLogin
+from .auth import RefreshTokenRequest, Token, TokenData, TokenPayload, UserLogin
 from .dashboard import (
     DashboardKpis,
     DashboardRegionItem,
@@ -8,6 +8,9 @@ from .dashboard import (
     DashboardTrendOptions,
 )
 from .data_collection import (
+    DataCollectionBulkCommitResult,
+    DataCollectionCommitRow,
+    DataCollectionCommitRowResult,
     DataCollectionCreate,
     DataCollectionRead,
     DataCollectionUploadRow,
@@ -16,6 +19,7 @@ from .data_collection import (
     DataCollectionUpdate,
 )
 from .household import HouseholdCreate, HouseholdListResponse, HouseholdRead, HouseholdUpdate
+from .job import JobRead
 from .password import ChangePasswordRequest
 from .policy import PolicyCreate, PolicyRead, PolicyUpdate
 from .policy_draft import PolicyDraftRead, PolicyDraftUpsert
@@ -29,6 +33,9 @@ __all__ = [
     "DashboardSummary",
     "DashboardTrendOptions",
     "DashboardKpis",
+    "DataCollectionBulkCommitResult",
+    "DataCollectionCommitRow",
+    "DataCollectionCommitRowResult",
     "DataCollectionCreate",
     "DataCollectionRead",
     "DataCollectionUploadRow",
@@ -39,12 +46,14 @@ __all__ = [
     "HouseholdListResponse",
     "HouseholdRead",
     "HouseholdUpdate",
+    "JobRead",
     "ChangePasswordRequest",
     "PolicyCreate",
     "PolicyRead",
     "PolicyUpdate",
     "PolicyDraftRead",
     "PolicyDraftUpsert",
+    "RefreshTokenRequest",
     "Token",
     "TokenData",
     "TokenPayload",
@@ -72,3 +72,43 @@ class DataCollectionUploadResult(BaseModel):
     errorRecords: int
     errors: list[DataCollectionUploadError]
     rows: list[DataCollectionUploadRow] = []
+
+
+class DataCollectionCommitRow(BaseModel):
+    row: int | None = None
+    name: str
+    dob: str | None = None
+    gender: str | None = None
+    ethnic: str | None = None
+    address_line: str | None = None
+    id_num: str
+    family_mem: int
+    classified_before_check: str | None = None
+    b1_score: int
+    b2_score: int
+    income_per_capita: float | None = None
+    classified_after_check: str
+    area: str | None = None
+    description: str | None = None
+    note: str | None = None
+    pdf_url: str | None = None
+    province: str
+    district: str
+    commune: str
+    village: str
+    date_check: str
+    official_check: str
+
+
+class DataCollectionCommitRowResult(BaseModel):
+    row: int
+    created: bool
+    household_id: int | None = None
+    household_code: str | None = None
+    error: str | None = None
+
+
+class DataCollectionBulkCommitResult(BaseModel):
+    created: int
+    failed: int
+    results: list[DataCollectionCommitRowResult]
@@ -70,4 +70,5 @@ class HouseholdRead(HouseholdBase):
 
 class HouseholdListResponse(BaseModel):
     items: list[HouseholdRead]
-    total: int
+    total: int | None = None
+    next_cursor: str | None = None
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+
+from ..constants import JobKind, JobStatus
+
+
+class JobRead(BaseModel):
+    id: str
+    kind: JobKind
+    status: JobStatus
+    total: int | None = None
+    processed: int
+    failed: int
+    result: Any | None = None
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,263 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO
+
+import aiofiles
+from fastapi import UploadFile
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import get_settings
+from ..database import SessionLocal
+
+BLOB_SUBDIR = "blobs"
+BLOB_INCOMING_SUBDIR = ".incoming"
+BLOB_CHUNK_SIZE = 1024 * 1024
+STORED_FILENAME_MAX_LENGTH = 255
+EXTENSION_PATTERN = re.compile(r"^\.[0-9a-z]{1,15}$")
+# Matched at the end of the URL: the FE stores it behind its API prefix ("/api/files/...").
+BLOB_URL_PATTERN = re.compile(r"/files/blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.[0-9a-z]+)?$")
+BLOB_SWEEP_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+_sweeper: threading.Thread | None = None
+_sweeper_stop = threading.Event()
+
+
+class BlobTooLargeError(Exception):
+    pass
+
+
+class SpooledBlob:
+    """Upload content written once to a scratch file, hashed on the way."""
+
+    def __init__(self, path: Path, digest: str, size: int) -> None:
+        self.path = path
+        self.digest = digest
+        self.size = size
+        self.placed = False
+
+    def discard(self) -> None:
+        if not self.placed:
+            self.path.unlink(missing_ok=True)
+
+
+def blob_relative_path(digest: str, extension: str) -> str:
+    return f"{BLOB_SUBDIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def parse_blob_url(url: str | None) -> str | None:
+    match = BLOB_URL_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
+
+def normalize_extension(filename: str | None) -> str:
+    extension = Path(filename or "").suffix.lower()
+    return extension if EXTENSION_PATTERN.match(extension) else ""
+
+
+def new_spool_path() -> Path:
+    # Inside the upload dir, so placing a blob is a rename on the same filesystem.
+    incoming = Path(get_settings().upload_dir) / BLOB_SUBDIR / BLOB_INCOMING_SUBDIR
+    incoming.mkdir(parents=True, exist_ok=True)
+    return incoming / uuid.uuid4().hex
+
+
+def spool_file(source: BinaryIO, max_bytes: int | None = None) -> SpooledBlob:
+    path = new_spool_path()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with path.open("wb") as output:
+            while chunk := source.read(BLOB_CHUNK_SIZE):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise BlobTooLargeError(size)
+                digest.update(chunk)
+                output.write(chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return SpooledBlob(path, digest.hexdigest(), size)
+
+
+async def spool_upload(upload: UploadFile, max_bytes: int | None = None) -> SpooledBlob:
+    path = new_spool_path()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(path, "wb") as output:
+            while chunk := await upload.read(BLOB_CHUNK_SIZE):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise BlobTooLargeError(size)
+                digest.update(chunk)
+                await output.write(chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return SpooledBlob(path, digest.hexdigest(), size)
+
+
+def add_blob_reference(
+    db: Session, spooled: SpooledBlob, extension: str, content_type: str | None, count: int
+) -> str:
+    """Add ``count`` (0 or 1) references to the blob, creating its row if new; return its extension."""
+    while True:
+        result = db.execute(
+            update(models.FileBlob)
+            .where(models.FileBlob.hash == spooled.digest)
+            .values(ref_count=models.FileBlob.ref_count + count)
+        )
+        if result.rowcount:
+            return db.get(models.FileBlob, spooled.digest).extension
+        try:
+            with db.begin_nested():
+                db.execute(
+                    insert(models.FileBlob).values(
+                        hash=spooled.digest,
+                        extension=extension,
+                        size=spooled.size,
+                        content_type=content_type,
+                        ref_count=count,
+                    )
+                )
+            return extension
+        except IntegrityError:
+            continue  # a concurrent upload of the same content created it first
+
+
+def store_file(
+    db: Session,
+    spooled: SpooledBlob,
+    filename: str,
+    content_type: str | None = None,
+    user_id: int | None = None,
+    reference: bool = True,
+) -> str:
+    """Keep ``spooled`` under its content hash and return its /files URL.
+
+    Identical content is stored once; ``filename`` is only recorded. The
+    rows join the caller's transaction. A rollback leaves at worst an
+    unreferenced blob on disk, which the next identical upload reuses.
+
+    ``reference`` counts the record being saved in the same transaction as
+    an owner. Plain uploads pass False: the record that later links the URL
+    takes the reference through ``acquire_file``, and an upload nobody links
+    is swept once ``BLOB_SWEEP_GRACE_SECONDS`` have passed.
+    """
+    extension = add_blob_reference(
+        db, spooled, normalize_extension(filename), content_type, int(reference)
+    )
+    relative_path = blob_relative_path(spooled.digest, extension)
+    if not spooled.placed:
+        target = Path(get_settings().upload_dir) / relative_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(spooled.path, target)
+        spooled.path = target
+        spooled.placed = True
+    db.add(
+        models.StoredFile(
+            blob_hash=spooled.digest,
+            filename=filename[:STORED_FILENAME_MAX_LENGTH],
+            user_id=user_id,
+        )
+    )
+    return f"/files/{relative_path}"
+
+
+def acquire_file(db: Session, url: str | None) -> None:
+    """Count one more owner of a blob URL; URLs outside the blob store are ignored."""
+    digest = parse_blob_url(url)
+    if not digest:
+        return
+    db.execute(
+        update(models.FileBlob)
+        .where(models.FileBlob.hash == digest)
+        .values(ref_count=models.FileBlob.ref_count + 1)
+    )
+
+
+def release_file(db: Session, url: str | None) -> None:
+    """Drop one reference to a blob URL; URLs outside the blob store are ignored.
+
+    Nothing is deleted here, so a rollback of the caller's transaction loses
+    no content. Blobs left without references are removed by
+    ``sweep_unreferenced_blobs``.
+    """
+    digest = parse_blob_url(url)
+    if not digest:
+        return
+    db.execute(
+        update(models.FileBlob)
+        .where(models.FileBlob.hash == digest, models.FileBlob.ref_count > 0)
+        .values(ref_count=models.FileBlob.ref_count - 1)
+    )
+
+
+def sweep_unreferenced_blobs(db: Session, limit: int = BLOB_SWEEP_BATCH_SIZE) -> int:
+    """Delete blobs with no references left, row and file; return how many went.
+
+    Blobs touched within ``BLOB_SWEEP_GRACE_SECONDS`` are kept, so a fresh
+    upload survives until its record links it. Each blob is re-checked under
+    a row lock in its own transaction, taken before its stored_files rows
+    like an upload does: one that is being re-referenced no longer matches
+    once the uploader's lock is released.
+    """
+    upload_root = Path(get_settings().upload_dir)
+    cutoff = datetime.utcnow() - timedelta(seconds=get_settings().blob_sweep_grace_seconds)
+    unreferenced = (models.FileBlob.ref_count <= 0, models.FileBlob.updated_at < cutoff)
+    candidates = db.execute(
+        select(models.FileBlob.hash, models.FileBlob.extension).where(*unreferenced).limit(limit)
+    ).all()
+    removed = 0
+    for digest, extension in candidates:
+        locked = db.scalar(
+            select(models.FileBlob.hash)
+            .where(models.FileBlob.hash == digest, *unreferenced)
+            .with_for_update()
+        )
+        if locked:
+            db.execute(delete(models.StoredFile).where(models.StoredFile.blob_hash == digest))
+            db.execute(delete(models.FileBlob).where(models.FileBlob.hash == digest))
+            # Unlinked before the commit: if the commit fails the row stays at
+            # zero references, and the next upload of this content rewrites the file.
+            (upload_root / blob_relative_path(digest, extension)).unlink(missing_ok=True)
+            removed += 1
+        db.commit()
+    return removed
+
+
+def run_blob_sweeper() -> None:
+    interval = get_settings().blob_sweep_seconds
+    while not _sweeper_stop.wait(interval):
+        try:
+            with SessionLocal() as db:
+                while sweep_unreferenced_blobs(db) == BLOB_SWEEP_BATCH_SIZE:
+                    pass
+        except Exception:
+            logger.exception("Blob sweep failed")
+
+
+def start_blob_sweeper() -> None:
+    global _sweeper
+    if get_settings().blob_sweep_seconds <= 0 or _sweeper is not None:
+        return
+    _sweeper_stop.clear()
+    _sweeper = threading.Thread(target=run_blob_sweeper, name="blob-sweeper", daemon=True)
+    _sweeper.start()
+
+
+def stop_blob_sweeper() -> None:
+    global _sweeper
+    _sweeper_stop.set()
+    _sweeper = None
@@ -0,0 +1,249 @@
+import gzip
+import zlib
+from typing import Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: br is only offered when brotli is installed
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: zstd is only offered when zstandard is installed
+    zstandard = None
+
+CODING_IDENTITY = "identity"
+CODING_GZIP = "gzip"
+CODING_BROTLI = "br"
+CODING_ZSTD = "zstd"
+# Cheapest to produce first: zstd and br at moderate levels beat gzip on JSON at similar CPU.
+DYNAMIC_CODINGS = tuple(
+    coding
+    for coding, available in (
+        (CODING_ZSTD, zstandard is not None),
+        (CODING_BROTLI, brotli is not None),
+        (CODING_GZIP, True),
+    )
+    if available
+)
+COMPRESS_MINIMUM_SIZE = 1000
+# Formats that are compressed already; another pass only costs CPU.
+INCOMPRESSIBLE_MEDIA_TYPES = {
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zstd",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+INCOMPRESSIBLE_MEDIA_PREFIXES = ("image/", "audio/", "video/", "font/woff")
+COMPRESSIBLE_IMAGE_TYPES = {"image/svg+xml"}
+
+
+class StreamCompressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class GzipStream:
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliStream:
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdStream:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+STREAMS: dict[str, type[StreamCompressor]] = {
+    CODING_GZIP: GzipStream,
+    CODING_BROTLI: BrotliStream,
+    CODING_ZSTD: ZstdStream,
+}
+
+
+def compress(data: bytes, coding: str, level: int) -> bytes:
+    if coding == CODING_GZIP:
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if coding == CODING_BROTLI:
+        return brotli.compress(data, quality=level)
+    if coding == CODING_ZSTD:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unsupported coding: {coding}")
+
+
+def accepted_codings(accept_encoding: str) -> set[str]:
+    codings: set[str] = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            codings.add(name)
+    return codings
+
+
+def is_accepted(coding: str, codings: set[str]) -> bool:
+    return coding in codings or "*" in codings
+
+
+def is_compressible(media_type: str) -> bool:
+    media_type = media_type.partition(";")[0].strip().lower()
+    if media_type in COMPRESSIBLE_IMAGE_TYPES:
+        return True
+    if media_type in INCOMPRESSIBLE_MEDIA_TYPES:
+        return False
+    return not media_type.startswith(INCOMPRESSIBLE_MEDIA_PREFIXES)
+
+
+class CompressionMiddleware:
+    """Compress responses on the fly with the best coding the client accepts.
+
+    ``route_levels`` maps path prefixes to a level (1-9, 0 disables), used as
+    the gzip level, brotli quality and zstd level alike; other paths use
+    ``level``. Responses that already carry a Content-Encoding (the
+    precompressed bodies from ``http_cache``), partial content and media
+    that is compressed already are passed through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        level: int,
+        route_levels: dict[str, int] | None = None,
+        minimum_size: int = COMPRESS_MINIMUM_SIZE,
+    ) -> None:
+        self.app = app
+        self.level = level
+        self.minimum_size = minimum_size
+        # Longest prefix first so "/gis/shapes" can override "/gis".
+        self.route_levels = sorted(
+            ((prefix.rstrip("/"), value) for prefix, value in (route_levels or {}).items()),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+
+    def level_for(self, path: str) -> int:
+        for prefix, level in self.route_levels:
+            if path == prefix or path.startswith(f"{prefix}/"):
+                return level
+        return self.level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        level = self.level_for(scope["path"])
+        codings = accepted_codings(Headers(scope=scope).get("accept-encoding", ""))
+        coding = next((name for name in DYNAMIC_CODINGS if is_accepted(name, codings)), None)
+        if level <= 0 or coding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(self.app, coding, level, self.minimum_size)
+        await responder(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, coding: str, level: int, minimum_size: int) -> None:
+        self.app = app
+        self.coding = coding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.send: Send
+        self.start_message: Message | None = None
+        self.stream: StreamCompressor | None = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    def should_skip(self, headers: Headers) -> bool:
+        return (
+            "content-encoding" in headers
+            or "content-range" in headers
+            or not is_compressible(headers.get("content-type", ""))
+        )
+
+    async def send_with_compression(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            self.passthrough = self.should_skip(Headers(raw=message["headers"]))
+            return
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            await self.start_body(start_message, message)
+            return
+        if self.passthrough:
+            await self.send(message)
+            return
+        body = self.stream.compress(message.get("body", b""))
+        if not message.get("more_body", False):
+            body += self.stream.finish()
+        message["body"] = body
+        await self.send(message)
+
+    async def start_body(self, start_message: Message, message: Message) -> None:
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.passthrough or (not more_body and len(body) < self.minimum_size):
+            self.passthrough = True
+            await self.send(start_message)
+            await self.send(message)
+            return
+        headers = MutableHeaders(raw=start_message["headers"])
+        headers["Content-Encoding"] = self.coding
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            # Each chunk is flushed so streamed progress (NDJSON) still arrives promptly.
+            del headers["Content-Length"]
+            self.stream = STREAMS[self.coding](self.level)
+            message["body"] = self.stream.compress(body)
+        else:
+            message["body"] = compress(body, self.coding, self.level)
+            headers["Content-Length"] = str(len(message["body"]))
+        await self.send(start_message)
+        await self.send(message)
@@ -0,0 +1,194 @@
+import hashlib
+import json
+from pathlib import Path
+
+from .dataset_watch import WatchedDataset
+from .indicator_store import IndicatorStore, get_data_path, get_processed_dir, refresh_indicator_store
+from .text import normalize_location
+
+REGION_FILE_NAME = "region_map.json"
+REGION_MAP_KEY = "province_to_region"
+DEFAULT_GEO_VERSION = "old_63"
+DEFAULT_METRIC = "count_households"
+POOR_INDICATOR_CODE = "1.3"
+NEAR_POOR_INDICATOR_CODE = "1.5"
+CUBE_INDICATOR_CODES = (POOR_INDICATOR_CODE, NEAR_POOR_INDICATOR_CODE)
+
+YearTotals = dict[int, float]
+
+
+def get_region_map_path() -> Path:
+    return get_processed_dir() / REGION_FILE_NAME
+
+
+def read_region_map(path: Path) -> dict[str, str]:
+    with path.open(encoding="utf-8") as handle:
+        payload = json.load(handle)
+    region_map: dict[str, str] = {}
+    for province, region in (payload.get(REGION_MAP_KEY) or {}).items():
+        region_map[normalize_location(province)] = (region or "").strip()
+    return region_map
+
+
+def percent_change(current: float, previous: float) -> float:
+    if previous == 0:
+        return 0.0
+    return ((current - previous) / previous) * 100
+
+
+class ScopeRollup:
+    """Poor / near-poor series and KPIs for one country, region or province scope."""
+
+    def __init__(self, poor_by_year: YearTotals, near_poor_by_year: YearTotals) -> None:
+        years = sorted(set(poor_by_year.keys()) | set(near_poor_by_year.keys()))
+        self.years = years
+        self.poor = [poor_by_year.get(year, 0.0) for year in years]
+        self.near_poor = [near_poor_by_year.get(year, 0.0) for year in years]
+        self.exit_poverty: list[float] = []
+        for index, year in enumerate(years):
+            if index == 0:
+                self.exit_poverty.append(0.0)
+                continue
+            previous_value = self.poor[index - 1]
+            current_value = self.poor[index]
+            self.exit_poverty.append(max(previous_value - current_value, 0.0))
+
+        self.latest_year: int | None = None
+        self.poor_total = 0.0
+        self.poor_delta_percent = 0.0
+        self.near_poor_total = 0.0
+        self.near_poor_delta_percent = 0.0
+        self.exit_poverty_total = 0.0
+        if not years:
+            return
+
+        latest_year = max(years)
+        previous_years = [year for year in years if year < latest_year]
+        previous_year = max(previous_years) if previous_years else None
+
+        latest_poor = poor_by_year.get(latest_year, 0.0)
+        latest_near_poor = near_poor_by_year.get(latest_year, 0.0)
+        previous_poor = poor_by_year.get(previous_year, 0.0) if previous_year else 0.0
+        previous_near_poor = near_poor_by_year.get(previous_year, 0.0) if previous_year else 0.0
+
+        self.latest_year = latest_year
+        self.poor_total = latest_poor
+        self.poor_delta_percent = percent_change(latest_poor, previous_poor)
+        self.near_poor_total = latest_near_poor
+        self.near_poor_delta_percent = percent_change(latest_near_poor, previous_near_poor)
+        self.exit_poverty_total = (
+            abs((latest_poor + latest_near_poor) - (previous_poor + previous_near_poor))
+            if previous_year
+            else 0.0
+        )
+
+
+EMPTY_ROLLUP = ScopeRollup({}, {})
+
+
+class DashboardCube:
+    """Year x region x province rollups of the dashboard indicators.
+
+    Built once per dataset version; every dashboard response is read from
+    it. ``region_map`` is None when region_map.json is missing, in which case
+    only the country and province scopes are available.
+    """
+
+    def __init__(self, version: str) -> None:
+        self.version = version
+        self.has_data = False
+        self.region_map: dict[str, str] | None = None
+        self.regions: list[str] = []
+        self.provinces: list[str] = []
+        self.country = EMPTY_ROLLUP
+        self.by_region: dict[str, ScopeRollup] = {}
+        self.by_province: dict[str, ScopeRollup] = {}
+        self.latest_years: dict[str, int] = {}
+        self.region_rankings: dict[tuple[str, int], list[tuple[str, float]]] = {}
+
+    def region_ranking(self, indicator_code: str, year: int) -> list[tuple[str, float]]:
+        return self.region_rankings.get((indicator_code, year), [])
+
+
+def build_dashboard_cube(
+    store: IndicatorStore,
+    region_map: dict[str, str] | None,
+    version: str,
+) -> DashboardCube:
+    cube = DashboardCube(version)
+    region_keys: dict[str, str] = {}
+    if region_map is not None:
+        cube.region_map = region_map
+        cube.regions = sorted({region for region in region_map.values() if region})
+        for province, region in region_map.items():
+            region_keys[province] = normalize_location(region)
+
+    country: dict[str, YearTotals] = {}
+    by_region: dict[str, dict[str, YearTotals]] = {key: {} for key in region_keys.values()}
+    by_province: dict[str, dict[str, YearTotals]] = {}
+    region_totals: dict[str, dict[int, dict[str, float]]] = {}
+    for indicator_code in CUBE_INDICATOR_CODES:
+        rows = store.select(indicator_code, DEFAULT_GEO_VERSION, metric=DEFAULT_METRIC)
+        if indicator_code == POOR_INDICATOR_CODE:
+            cube.has_data = bool(rows)
+            cube.provinces = sorted({store.geo_name_at(row) for row in rows} - {""})
+        country_totals = country.setdefault(indicator_code, {})
+        ranking_totals = region_totals.setdefault(indicator_code, {})
+        for row in rows:
+            year = store.year_at(row)
+            value = store.value_at(row)
+            geo_key = store.geo_key_at(row)
+            country_totals[year] = country_totals.get(year, 0.0) + value
+            province_totals = by_province.setdefault(geo_key, {}).setdefault(indicator_code, {})
+            province_totals[year] = province_totals.get(year, 0.0) + value
+            region_key = region_keys.get(geo_key)
+            if region_key is not None:
+                totals = by_region[region_key].setdefault(indicator_code, {})
+                totals[year] = totals.get(year, 0.0) + value
+            region = region_map.get(geo_key) if region_map is not None else None
+            if region:
+                year_totals = ranking_totals.setdefault(year, {})
+                year_totals[region] = year_totals.get(region, 0.0) + value
+
+    def rollup(totals: dict[str, YearTotals]) -> ScopeRollup:
+        return ScopeRollup(
+            totals.get(POOR_INDICATOR_CODE, {}),
+            totals.get(NEAR_POOR_INDICATOR_CODE, {}),
+        )
+
+    cube.country = rollup(country)
+    cube.by_region = {key: rollup(totals) for key, totals in by_region.items()}
+    cube.by_province = {key: rollup(totals) for key, totals in by_province.items()}
+    for indicator_code, totals in country.items():
+        if totals:
+            cube.latest_years[indicator_code] = max(totals)
+    for indicator_code, totals_by_year in region_totals.items():
+        for year, totals in totals_by_year.items():
+            cube.region_rankings[(indicator_code, year)] = sorted(
+                totals.items(),
+                key=lambda item: item[1],
+                reverse=True,
+            )
+    return cube
+
+
+def load_dashboard_cube() -> DashboardCube:
+    store = refresh_indicator_store()
+    region_path = get_region_map_path()
+    region_map = read_region_map(region_path) if region_path.exists() else None
+    region_version = (
+        hashlib.sha256(region_path.read_bytes()).hexdigest() if region_map is not None else ""
+    )
+    version = hashlib.sha256(f"{store.version}:{region_version}".encode("utf-8")).hexdigest()
+    return build_dashboard_cube(store, region_map, version)
+
+
+_CUBE_WATCH = WatchedDataset(
+    lambda: [get_data_path(), get_region_map_path()],
+    load_dashboard_cube,
+)
+
+
+def get_dashboard_cube() -> DashboardCube:
+    """Return the current cube; raises FileNotFoundError if the CSV is missing."""
+    return _CUBE_WATCH.get()
@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Generic, TypeVar
+
+from ..config import get_settings
+
+T = TypeVar("T")
+
+HASH_CHUNK_SIZE = 1024 * 1024
+FileSignature = tuple[tuple[str, int | None, int | None], ...]
+
+logger = logging.getLogger(__name__)
+
+
+def file_signature(paths: list[Path]) -> FileSignature:
+    signature: list[tuple[str, int | None, int | None]] = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            signature.append((str(path), None, None))
+            continue
+        signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def file_digest(paths: list[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(str(path).encode("utf-8"))
+        if not path.exists():
+            digest.update(b"\0missing")
+            continue
+        with path.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class WatchedDataset(Generic[T]):
+    """A value built from files on disk, rebuilt in the background when they change.
+
+    Requests always get the current value without waiting. At most every
+    ``DATASET_RELOAD_SECONDS`` the files are stat'ed; if their mtime or size
+    moved, a daemon thread hashes them and, only if the content differs,
+    builds a new value and swaps it in with a single assignment.
+    """
+
+    def __init__(self, paths: Callable[[], list[Path]], builder: Callable[[], T]) -> None:
+        self.paths = paths
+        self.builder = builder
+        self._value: T | None = None
+        self._signature: FileSignature | None = None
+        self._digest: str | None = None
+        self._checked_at = 0.0
+        self._load_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    @property
+    def digest(self) -> str | None:
+        return self._digest
+
+    def get(self) -> T:
+        value = self._value
+        if value is None:
+            return self.refresh()
+        interval = get_settings().dataset_reload_seconds
+        now = time.monotonic()
+        if interval <= 0 or now - self._checked_at < interval:
+            return value
+        self._checked_at = now
+        if file_signature(self.paths()) != self._signature and self._reload_lock.acquire(blocking=False):
+            threading.Thread(target=self._reload_in_background, daemon=True).start()
+        return value
+
+    def refresh(self) -> T:
+        """Synchronously rebuild if the files changed and return the current value."""
+        with self._load_lock:
+            paths = self.paths()
+            signature = file_signature(paths)
+            if self._value is not None and signature == self._signature:
+                return self._value
+            digest = file_digest(paths)
+            if self._value is None or digest != self._digest:
+                self._value = self.builder()
+                self._digest = digest
+            self._signature = signature
+            self._checked_at = time.monotonic()
+            return self._value
+
+    def _reload_in_background(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Failed to reload dataset, keeping the previous version")
+        finally:
+            self._reload_lock.release()
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from ..config import get_settings
+from .dataset_watch import WatchedDataset
+from .geometry import build_topology, simplify_topology
+from .http_cache import encode_json
+
+GEOJSON_FILES = {
+    "old_63": "Việt Nam (tỉnh thành) - 63.geojson",
+    "new_34": "Việt Nam (tỉnh thành) - 34.geojson",
+}
+GEO_CODE_FIELD = "ma_tinh"
+SHAPE_ZOOM_LEVELS = (4, 5, 6, 7, 8, 9, 10)
+SHAPES_FORMAT_VERSION = 1
+SHAPES_FILE_SUFFIX = ".topojson"
+
+logger = logging.getLogger(__name__)
+
+
+def get_geo_data_dir() -> Path:
+    here = Path(__file__).resolve()
+    for parent in here.parents:
+        if (parent / "FE" / "data").exists():
+            return parent / "FE" / "data"
+    return here.parents[3] / "FE" / "data"
+
+
+def get_geojson_path(geo_version: str) -> Path:
+    return get_geo_data_dir() / GEOJSON_FILES[geo_version]
+
+
+def encode_around(members: dict[str, Any], slot: str) -> tuple[bytes, bytes]:
+    """Pre-encode an object as the JSON before and after the value of ``slot``.
+
+    ``slot`` keeps its position in ``members``; if absent it goes last, as a
+    dict assignment would put it.
+    """
+    keys = list(members) if slot in members else [*members, slot]
+    before: list[bytes] = []
+    after: list[bytes] = []
+    target = before
+    for key in keys:
+        if key == slot:
+            target = after
+            continue
+        target.append(encode_json(key) + b":" + encode_json(members[key]))
+    head = b"{" + b"".join(part + b"," for part in before) + encode_json(slot) + b":"
+    tail = b"".join(b"," + part for part in after) + b"}"
+    return head, tail
+
+
+def freeze(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return {key: freeze(item) for key, item in value.items()}
+    return value
+
+
+class GeoFeature:
+    __slots__ = ("geo_code", "members", "properties", "head", "tail")
+
+    def __init__(self, geo_code: str, members: dict[str, Any], properties: dict[str, Any]) -> None:
+        self.geo_code = geo_code
+        self.members = members
+        self.properties = properties
+        self.head, self.tail = encode_around(members, "properties")
+
+    @property
+    def geometry(self) -> Any:
+        return self.members.get("geometry")
+
+
+class GeoLayer:
+    """Parsed province polygons for one geo_version, shared by every request.
+
+    Coordinates are stored as nested tuples and nothing here is mutated after
+    load; responses copy ``properties`` and reference everything else as-is.
+    ``members`` keeps the top-level keys in file order, with "features" set
+    to None as a placeholder. Geometry is also kept pre-encoded, so
+    ``encode`` only has to serialize the per-request properties.
+    """
+
+    def __init__(self, geo_version: str, version: str) -> None:
+        self.geo_version = geo_version
+        self.version = version
+        self.members: dict[str, Any] = {}
+        self.features: tuple[GeoFeature, ...] = ()
+        self.head = b""
+        self.tail = b""
+
+    @property
+    def geo_codes(self) -> list[str]:
+        return [feature.geo_code for feature in self.features]
+
+    def encode(self, properties: list[dict[str, Any]]) -> bytes:
+        """Serialize the collection with ``properties[i]`` on feature i."""
+        features = b",".join(
+            feature.head + encode_json(props) + feature.tail
+            for feature, props in zip(self.features, properties)
+        )
+        return self.head + b"[" + features + b"]" + self.tail
+
+
+def load_geo_layer(geo_version: str) -> GeoLayer:
+    path = get_geojson_path(geo_version)
+    raw = path.read_bytes()
+    payload = json.loads(raw)
+    layer = GeoLayer(geo_version, hashlib.sha256(raw).hexdigest())
+    layer.members = {
+        key: None if key == "features" else freeze(value) for key, value in payload.items()
+    }
+    features: list[GeoFeature] = []
+    for feature in payload.get("features", []):
+        properties = dict(feature.get("properties", {}))
+        geo_code = str(properties.get(GEO_CODE_FIELD) or "")
+        members = {key: freeze(value) for key, value in feature.items()}
+        features.append(GeoFeature(geo_code, members, properties))
+    layer.features = tuple(features)
+    layer.head, layer.tail = encode_around(layer.members, "features")
+    return layer
+
+
+_LAYER_WATCHES: dict[str, WatchedDataset[GeoLayer]] = {
+    geo_version: WatchedDataset(
+        lambda geo_version=geo_version: [get_geojson_path(geo_version)],
+        lambda geo_version=geo_version: load_geo_layer(geo_version),
+    )
+    for geo_version in GEOJSON_FILES
+}
+
+
+def get_geo_layer(geo_version: str) -> GeoLayer:
+    """Raise KeyError for an unknown geo_version, FileNotFoundError if its file is missing."""
+    return _LAYER_WATCHES[geo_version].get()
+
+
+_SHAPES_LOCK = threading.Lock()
+
+
+def get_shapes_path(layer: GeoLayer, level: int) -> Path:
+    name = f"{layer.geo_version}-{layer.version[:16]}-v{SHAPES_FORMAT_VERSION}-z{level}"
+    return Path(get_settings().geometry_cache_dir) / f"{name}{SHAPES_FILE_SUFFIX}"
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+
+
+def build_layer_shapes(layer: GeoLayer) -> dict[int, bytes]:
+    topology = build_topology([(feature.properties, feature.geometry) for feature in layer.features])
+    return {
+        level: encode_json(simplify_topology(topology, level)) for level in SHAPE_ZOOM_LEVELS
+    }
+
+
+def load_layer_shapes(layer: GeoLayer, level: int) -> bytes:
+    """Return the TopoJSON for ``level``, building every level on the first miss.
+
+    Results are written to GEOMETRY_CACHE_DIR keyed by the GeoJSON hash, so
+    they survive restarts and are rebuilt only when the source file changes.
+    """
+    path = get_shapes_path(layer, level)
+    if path.exists():
+        return path.read_bytes()
+    with _SHAPES_LOCK:
+        if path.exists():
+            return path.read_bytes()
+        shapes = build_layer_shapes(layer)
+        try:
+            for shape_level, data in shapes.items():
+                write_atomic(get_shapes_path(layer, shape_level), data)
+        except OSError:
+            logger.exception("Failed to write simplified shapes to %s", path.parent)
+        return shapes[level]
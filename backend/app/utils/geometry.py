@@ -0,0 +1,287 @@
+from typing import Any, Iterable
+
+Point = tuple[int, int]
+ArcRef = int
+
+QUANTIZATION = 100_000
+TILE_SIZE = 256
+SIMPLIFY_PIXELS = 1.0
+PIXEL_SUBDIVISIONS = 4
+OBJECT_NAME = "provinces"
+
+
+def polygons_of(geometry: Any) -> list[Any]:
+    """Return the polygon coordinate arrays of a Polygon or MultiPolygon geometry."""
+    if not geometry:
+        return []
+    kind = geometry.get("type")
+    if kind == "Polygon":
+        return [geometry.get("coordinates") or ()]
+    if kind == "MultiPolygon":
+        return list(geometry.get("coordinates") or ())
+    return []
+
+
+def degrees_per_pixel(zoom: int) -> float:
+    return 360.0 / (TILE_SIZE * 2**zoom)
+
+
+def douglas_peucker(points: list[Point], tolerance: float) -> list[Point]:
+    """Simplify a polyline, always keeping both endpoints.
+
+    A closed chain (first == last) measures distance to that point, so the
+    farthest vertex is kept and the chain cannot collapse to a single point.
+    """
+    count = len(points)
+    if count <= 2 or tolerance <= 0:
+        return list(points)
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    limit = tolerance * tolerance
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        ax, ay = points[first]
+        bx, by = points[last]
+        dx = bx - ax
+        dy = by - ay
+        length = dx * dx + dy * dy
+        farthest = -1.0
+        index = first
+        for position in range(first + 1, last):
+            px, py = points[position]
+            if length == 0:
+                distance = (px - ax) ** 2 + (py - ay) ** 2
+            else:
+                cross = (px - ax) * dy - (py - ay) * dx
+                distance = cross * cross / length
+            if distance > farthest:
+                farthest = distance
+                index = position
+        if farthest > limit:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def coarsen(points: list[Point], factor: int) -> list[Point]:
+    """Snap points to a grid ``factor`` times coarser, dropping repeated points."""
+    if factor <= 1:
+        return points
+    half = factor // 2
+    snapped: list[Point] = []
+    for x, y in points:
+        point = ((x + half) // factor, (y + half) // factor)
+        if not snapped or snapped[-1] != point:
+            snapped.append(point)
+    if len(snapped) == 1:
+        snapped.append(snapped[0])
+    return snapped
+
+
+class Topology:
+    """Province polygons as quantized arcs shared between neighbouring rings.
+
+    Every border between two provinces is stored once, cut at the points
+    where three or more rings meet and stored in a canonical direction, so
+    simplifying an arc changes both neighbours identically and no gaps or
+    slivers open up between them.
+    """
+
+    def __init__(self) -> None:
+        self.bbox = (0.0, 0.0, 0.0, 0.0)
+        self.scale = 1.0
+        self.arcs: list[list[Point]] = []
+        self.properties: list[dict[str, Any]] = []
+        # feature -> polygons -> rings -> arc refs (~index when reversed)
+        self.shapes: list[list[list[list[ArcRef]]]] = []
+
+
+def iter_positions(features: Iterable[tuple[dict[str, Any], Any]]) -> Iterable[tuple[float, float]]:
+    for _, geometry in features:
+        for polygon in polygons_of(geometry):
+            for ring in polygon:
+                for position in ring:
+                    yield position[0], position[1]
+
+
+def quantize_ring(ring: Any, x0: float, y0: float, scale: float) -> list[Point]:
+    points: list[Point] = []
+    for position in ring:
+        point = (round((position[0] - x0) / scale), round((position[1] - y0) / scale))
+        if not points or points[-1] != point:
+            points.append(point)
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    return points
+
+
+def build_topology(features: list[tuple[dict[str, Any], Any]]) -> Topology:
+    """Build a topology from (properties, geometry) pairs in feature order."""
+    topology = Topology()
+    xs: list[float] = []
+    ys: list[float] = []
+    for x, y in iter_positions(features):
+        xs.append(x)
+        ys.append(y)
+    if not xs:
+        topology.properties = [dict(properties) for properties, _ in features]
+        topology.shapes = [[] for _ in features]
+        return topology
+    x0, y0, x1, y1 = min(xs), min(ys), max(xs), max(ys)
+    del xs, ys
+    topology.bbox = (x0, y0, x1, y1)
+    topology.scale = max(x1 - x0, y1 - y0) / (QUANTIZATION - 1) or 1.0
+
+    rings_by_feature: list[list[list[list[Point]]]] = []
+    for properties, geometry in features:
+        polygons: list[list[list[Point]]] = []
+        for polygon in polygons_of(geometry):
+            rings = [quantize_ring(ring, x0, y0, topology.scale) for ring in polygon]
+            if not rings or len(rings[0]) < 3:
+                continue
+            polygons.append([ring for ring in rings if len(ring) >= 3])
+        topology.properties.append(dict(properties))
+        rings_by_feature.append(polygons)
+
+    neighbours: dict[Point, tuple[Point, Point]] = {}
+    junctions: set[Point] = set()
+    for polygons in rings_by_feature:
+        for rings in polygons:
+            for ring in rings:
+                count = len(ring)
+                for index, point in enumerate(ring):
+                    previous = ring[index - 1]
+                    following = ring[(index + 1) % count]
+                    pair = (previous, following) if previous <= following else (following, previous)
+                    seen = neighbours.setdefault(point, pair)
+                    if seen != pair:
+                        junctions.add(point)
+    del neighbours
+
+    arc_ids: dict[tuple[Point, ...], int] = {}
+
+    def add_arc(chain: list[Point]) -> ArcRef:
+        key = tuple(chain)
+        reverse_key = key[::-1]
+        reversed_ = reverse_key < key
+        if reversed_:
+            key = reverse_key
+        index = arc_ids.get(key)
+        if index is None:
+            index = len(topology.arcs)
+            arc_ids[key] = index
+            topology.arcs.append(list(key))
+        return ~index if reversed_ else index
+
+    def cut_ring(ring: list[Point]) -> list[ArcRef]:
+        cuts = [index for index, point in enumerate(ring) if point in junctions]
+        if not cuts:
+            start = ring.index(min(ring))
+            rotated = ring[start:] + ring[:start]
+            return [add_arc(rotated + [rotated[0]])]
+        start = cuts[0]
+        rotated = ring[start:] + ring[:start]
+        refs: list[ArcRef] = []
+        chain = [rotated[0]]
+        for point in rotated[1:]:
+            chain.append(point)
+            if point in junctions:
+                refs.append(add_arc(chain))
+                chain = [point]
+        chain.append(rotated[0])
+        refs.append(add_arc(chain))
+        return refs
+
+    for polygons in rings_by_feature:
+        topology.shapes.append([[cut_ring(ring) for ring in rings] for rings in polygons])
+    return topology
+
+
+def ring_points(arcs: list[list[Point]], refs: list[ArcRef]) -> list[Point]:
+    points: list[Point] = []
+    for ref in refs:
+        arc = arcs[~ref][::-1] if ref < 0 else arcs[ref]
+        points.extend(arc if not points else arc[1:])
+    return points
+
+
+def is_degenerate(arcs: list[list[Point]], refs: list[ArcRef]) -> bool:
+    return len(set(ring_points(arcs, refs))) < 3
+
+
+def simplify_topology(topology: Topology, zoom: int) -> dict[str, Any]:
+    """Return a TopoJSON document simplified and quantized for ``zoom``.
+
+    Arcs are simplified to ``SIMPLIFY_PIXELS`` and snapped to a
+    1/``PIXEL_SUBDIVISIONS`` pixel grid. A ring that collapses keeps its
+    unsimplified arcs; rings still smaller than the grid are dropped.
+    """
+    pixel = degrees_per_pixel(zoom) / topology.scale
+    factor = max(1, int(pixel / PIXEL_SUBDIVISIONS))
+    arcs = [coarsen(douglas_peucker(arc, SIMPLIFY_PIXELS * pixel), factor) for arc in topology.arcs]
+
+    for polygons in topology.shapes:
+        for rings in polygons:
+            for refs in rings:
+                if is_degenerate(arcs, refs):
+                    for ref in refs:
+                        index = ~ref if ref < 0 else ref
+                        arcs[index] = coarsen(topology.arcs[index], factor)
+
+    used: dict[int, int] = {}
+
+    def renumber(ref: ArcRef) -> ArcRef:
+        index = ~ref if ref < 0 else ref
+        new_index = used.setdefault(index, len(used))
+        return ~new_index if ref < 0 else new_index
+
+    geometries: list[dict[str, Any]] = []
+    for properties, polygons in zip(topology.properties, topology.shapes):
+        kept: list[list[list[ArcRef]]] = []
+        for rings in polygons:
+            if is_degenerate(arcs, rings[0]):
+                continue
+            kept.append(
+                [[renumber(ref) for ref in refs] for refs in rings if not is_degenerate(arcs, refs)]
+            )
+        geometry: dict[str, Any]
+        if not kept:
+            geometry = {"type": None}
+        elif len(kept) == 1:
+            geometry = {"type": "Polygon", "arcs": kept[0]}
+        else:
+            geometry = {"type": "MultiPolygon", "arcs": kept}
+        geometry["properties"] = properties
+        geometries.append(geometry)
+
+    encoded_arcs: list[list[list[int]]] = []
+    for index in sorted(used, key=used.__getitem__):
+        encoded: list[list[int]] = []
+        last_x = last_y = 0
+        for x, y in arcs[index]:
+            encoded.append([x - last_x, y - last_y])
+            last_x, last_y = x, y
+        encoded_arcs.append(encoded)
+
+    x0, y0, _, _ = topology.bbox
+    scale = topology.scale * factor
+    return {
+        "type": "Topology",
+        "bbox": list(topology.bbox),
+        "transform": {"scale": [scale, scale], "translate": [x0, y0]},
+        "objects": {OBJECT_NAME: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": encoded_arcs,
+    }
+
+
+def zoom_level(zoom: int, levels: tuple[int, ...]) -> int:
+    """Pick the coarsest precomputed level that is still detailed enough for ``zoom``."""
+    for level in levels:
+        if level >= zoom:
+            return level
+    return levels[-1]
+
@@ -1,24 +1,159 @@
-from sqlalchemy import Integer, cast, func
+import threading
+
+from sqlalchemy import (
+    ColumnElement,
+    Connection,
+    Engine,
+    Integer,
+    case,
+    cast,
+    create_engine,
+    func,
+    insert,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from .. import models
+from ..config import get_settings
 
 HOUSEHOLD_CODE_PREFIX = "HH-"
 HOUSEHOLD_CODE_PAD = 4
+# Longest suffix that still fits the BIGINT counter.
+HOUSEHOLD_CODE_MAX_DIGITS = 18
+HOUSEHOLD_CODE_PATTERN = f"^{HOUSEHOLD_CODE_PREFIX}[0-9]{{1,{HOUSEHOLD_CODE_MAX_DIGITS}}}$"
+HOUSEHOLD_CODE_COUNTER = "household"
 
+COUNTERS = models.HouseholdCodeCounter.__table__
 
-def generate_household_code(db: Session) -> str:
-    max_suffix = (
-        db.query(
-            func.max(
-                cast(
-                    func.substr(models.Household.household_code, len(HOUSEHOLD_CODE_PREFIX) + 1),
-                    Integer,
-                )
-            )
-        )
-        .filter(models.Household.household_code.like(f"{HOUSEHOLD_CODE_PREFIX}%"))
-        .scalar()
+# Session engine -> engine with a small pool used only by the counter.
+_counter_engines: dict[Engine, Engine] = {}
+_counter_engines_lock = threading.Lock()
+
+
+def format_household_code(number: int) -> str:
+    return f"{HOUSEHOLD_CODE_PREFIX}{str(number).zfill(HOUSEHOLD_CODE_PAD)}"
+
+
+def parse_household_number(household_code: str) -> int | None:
+    if not household_code.startswith(HOUSEHOLD_CODE_PREFIX):
+        return None
+    suffix = household_code[len(HOUSEHOLD_CODE_PREFIX) :]
+    # isdigit() alone accepts "²" and other digits int() rejects.
+    if not (suffix.isascii() and suffix.isdigit()) or len(suffix) > HOUSEHOLD_CODE_MAX_DIGITS:
+        return None
+    return int(suffix)
+
+
+def seed_counter(connection: Connection) -> None:
+    """Create the counter row from the highest existing code (one scan, first use only).
+
+    Only codes ``parse_household_number`` accepts count: hand-typed codes such
+    as "HH-2024-001" or "HH-ABC" would otherwise seed a bogus number or, under
+    MySQL strict mode, fail the CAST inside INSERT ... SELECT.
+    """
+    households = models.Household.__table__
+    suffix = func.substr(households.c.household_code, len(HOUSEHOLD_CODE_PREFIX) + 1)
+    current_max = select(
+        literal(HOUSEHOLD_CODE_COUNTER),
+        func.coalesce(func.max(cast(suffix, Integer)), 0),
+    ).where(
+        households.c.household_code.like(f"{HOUSEHOLD_CODE_PREFIX}%"),
+        households.c.household_code.regexp_match(HOUSEHOLD_CODE_PATTERN),
     )
-    next_code = (max_suffix or 0) + 1
-    return f"{HOUSEHOLD_CODE_PREFIX}{str(next_code).zfill(HOUSEHOLD_CODE_PAD)}"
+    try:
+        connection.execute(insert(COUNTERS).from_select(["name", "value"], current_max))
+    except IntegrityError:
+        pass  # another worker seeded it first
+
+
+def update_counter(connection: Connection, value: ColumnElement[int]) -> int | None:
+    """Set the counter to ``value`` (an expression) and return the result, or None if unseeded."""
+    condition = COUNTERS.c.name == HOUSEHOLD_CODE_COUNTER
+    if connection.dialect.name == "mysql":
+        # LAST_INSERT_ID(expr) hands the new value back on this connection without a read.
+        result = connection.execute(
+            update(COUNTERS).where(condition).values(value=func.last_insert_id(value))
+        )
+        return connection.scalar(select(func.last_insert_id())) if result.rowcount else None
+    result = connection.execute(update(COUNTERS).where(condition).values(value=value))
+    return connection.scalar(select(COUNTERS.c.value).where(condition)) if result.rowcount else None
+
+
+def get_counter_engine(engine: Engine) -> Engine:
+    """A separate small pool for the counter, on the same database as ``engine``.
+
+    Callers already hold a connection from the shared pool; taking a second
+    one from it could deadlock once every request thread holds its first.
+    """
+    with _counter_engines_lock:
+        counter_engine = _counter_engines.get(engine)
+        if counter_engine is None:
+            settings = get_settings()
+            options = {}
+            if engine.dialect.name != "sqlite":
+                options = {
+                    "pool_size": settings.db_counter_pool_size,
+                    "max_overflow": 0,
+                    "pool_timeout": settings.db_pool_timeout,
+                    "pool_recycle": settings.db_pool_recycle,
+                    "pool_pre_ping": settings.db_pool_pre_ping,
+                }
+            counter_engine = create_engine(engine.url, **options)
+            _counter_engines[engine] = counter_engine
+    return counter_engine
+
+
+def dispose_counter_engines() -> None:
+    with _counter_engines_lock:
+        engines = list(_counter_engines.values())
+        _counter_engines.clear()
+    for counter_engine in engines:
+        counter_engine.dispose()
+
+
+def run_counter_update(db: Session, value: ColumnElement[int]) -> int:
+    """Apply ``value`` to the counter outside the caller's transaction.
+
+    The counter row is only locked for this one statement, so concurrent
+    creates do not queue behind each other's transactions. Numbers taken by
+    a transaction that later rolls back are skipped, never reused.
+    """
+    engine = get_counter_engine(db.get_bind().engine)
+    if engine.dialect.name == "mysql":
+        context = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    else:
+        context = engine.begin()
+    with context as connection:
+        result = update_counter(connection, value)
+        if result is None:
+            seed_counter(connection)
+            result = update_counter(connection, value)
+    return result
+
+
+def reserve_household_numbers(db: Session, count: int) -> int:
+    """Atomically reserve ``count`` consecutive numbers and return the first."""
+    return run_counter_update(db, COUNTERS.c.value + count) - count + 1
+
+
+def generate_household_code(db: Session) -> str:
+    return format_household_code(reserve_household_numbers(db, 1))
+
+
+def allocate_household_codes(db: Session, count: int) -> list[str]:
+    if count <= 0:
+        return []
+    first = reserve_household_numbers(db, count)
+    return [format_household_code(number) for number in range(first, first + count)]
+
+
+def observe_household_code(db: Session, household_code: str) -> None:
+    """Move the counter past a code chosen by hand so it is never allocated again."""
+    number = parse_household_number(household_code)
+    if number is None:
+        return
+    run_counter_update(db, case((COUNTERS.c.value < number, number), else_=COUNTERS.c.value))
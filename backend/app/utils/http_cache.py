@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import queue
+import threading
+from typing import Any
+
+from fastapi import Request, Response, status
+
+from .compression import (
+    CODING_BROTLI,
+    CODING_GZIP,
+    CODING_IDENTITY,
+    CODING_ZSTD,
+    COMPRESS_MINIMUM_SIZE,
+    accepted_codings,
+    brotli,
+    compress,
+    is_accepted,
+    zstandard,
+)
+
+JSON_MEDIA_TYPE = "application/json"
+# (gzip, br, zstd) levels. Fast ones are built inline on a cache miss; the
+# slow, smallest ones replace them in the background once the body is cached.
+FAST_LEVELS = {CODING_GZIP: 6, CODING_BROTLI: 5, CODING_ZSTD: 3}
+MAX_LEVELS = {CODING_GZIP: 9, CODING_BROTLI: 11, CODING_ZSTD: 19}
+FAST_ETAG_SUFFIX = "-fast"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+PRIVATE_REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def encode_json(value: Any) -> bytes:
+    """Encode exactly like FastAPI's JSONResponse."""
+    return json.dumps(
+        value,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha256(":".join(str(part) for part in parts).encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+logger = logging.getLogger(__name__)
+
+_recompress_queue: "queue.SimpleQueue[EncodedBody]" = queue.SimpleQueue()
+_recompress_worker: threading.Thread | None = None
+_recompress_lock = threading.Lock()
+
+
+def compress_variants(body: bytes, levels: dict[str, int]) -> dict[str, bytes]:
+    variants = {CODING_IDENTITY: body}
+    if brotli is not None:
+        variants[CODING_BROTLI] = compress(body, CODING_BROTLI, levels[CODING_BROTLI])
+    if zstandard is not None:
+        variants[CODING_ZSTD] = compress(body, CODING_ZSTD, levels[CODING_ZSTD])
+    variants[CODING_GZIP] = compress(body, CODING_GZIP, levels[CODING_GZIP])
+    return variants
+
+
+class EncodedBody:
+    """A response body serialized once, with its precompressed variants.
+
+    ``variants`` maps content-coding ("identity", "gzip", "br", "zstd") to
+    bytes; br and zstd only when their libraries are installed. Bodies under
+    ``COMPRESS_MINIMUM_SIZE`` are only kept as identity. The variants start
+    at ``FAST_LEVELS`` and are swapped for ``MAX_LEVELS`` ones by a
+    background thread, so a cold request never waits for brotli 11.
+    """
+
+    def __init__(self, body: bytes, etag: str, media_type: str = JSON_MEDIA_TYPE) -> None:
+        self.etag = etag
+        self.media_type = media_type
+        self.final = len(body) < COMPRESS_MINIMUM_SIZE
+        if self.final:
+            self.variants: dict[str, bytes] = {CODING_IDENTITY: body}
+            return
+        self.variants = compress_variants(body, FAST_LEVELS)
+        schedule_recompress(self)
+
+    def __len__(self) -> int:
+        return sum(len(body) for body in self.variants.values())
+
+    def recompress(self) -> None:
+        # One assignment, so readers see either the fast or the final set.
+        self.variants = compress_variants(self.variants[CODING_IDENTITY], MAX_LEVELS)
+        self.final = True
+
+    def variant_etag(self, coding: str) -> str:
+        if coding == CODING_IDENTITY:
+            return self.etag
+        # Fast and final bytes differ, so they get different (but matching) tags.
+        suffix = "" if self.final else FAST_ETAG_SUFFIX
+        return f'{self.etag[:-1]}-{coding}{suffix}"'
+
+
+def run_recompress_worker() -> None:
+    while True:
+        body = _recompress_queue.get()
+        try:
+            body.recompress()
+        except Exception:
+            logger.exception("Failed to recompress a cached body, keeping fast variants")
+
+
+def schedule_recompress(body: EncodedBody) -> None:
+    global _recompress_worker
+    with _recompress_lock:
+        if _recompress_worker is None:
+            _recompress_worker = threading.Thread(
+                target=run_recompress_worker, name="recompress", daemon=True
+            )
+            _recompress_worker.start()
+    _recompress_queue.put(body)
+
+
+def estimate_encoded_size(value: EncodedBody) -> int:
+    return len(value)
+
+
+def choose_coding(body: EncodedBody, accept_encoding: str) -> str:
+    """Pick the smallest variant the client accepts."""
+    codings = accepted_codings(accept_encoding)
+    candidates = [
+        coding
+        for coding in body.variants
+        if coding != CODING_IDENTITY and is_accepted(coding, codings)
+    ]
+    if not candidates:
+        return CODING_IDENTITY
+    return min(candidates, key=lambda coding: len(body.variants[coding]))
+
+
+def matching_etag(if_none_match: str, etag: str) -> str | None:
+    """Return the client's tag if it names ``etag`` in any coding (or is "*")."""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return etag
+        opaque = tag.removeprefix("W/").strip('"').partition("-")[0]
+        if opaque == etag.strip('"'):
+            return tag.removeprefix("W/")
+    return None
+
+
+def not_modified_response(
+    request: Request, etag: str, cache_control: str = REVALIDATE_CACHE_CONTROL
+) -> Response | None:
+    """Answer a conditional GET without building the body when the client is current."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    tag = matching_etag(if_none_match, etag)
+    if tag is None:
+        return None
+    headers = {
+        "ETag": tag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+def encoded_response(
+    request: Request, body: EncodedBody, cache_control: str = REVALIDATE_CACHE_CONTROL
+) -> Response:
+    """Serve ``body`` in the best coding the client accepts.
+
+    The Content-Encoding header makes CompressionMiddleware pass it through.
+    """
+    not_modified = not_modified_response(request, body.etag, cache_control)
+    if not_modified is not None:
+        return not_modified
+    coding = choose_coding(body, request.headers.get("accept-encoding", ""))
+    headers = {
+        "ETag": body.variant_etag(coding),
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if coding != CODING_IDENTITY:
+        headers["Content-Encoding"] = coding
+    return Response(content=body.variants[coding], media_type=body.media_type, headers=headers)
@@ -0,0 +1,429 @@
+import csv
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any
+
+from .dataset_watch import WatchedDataset
+from .text import normalize_location
+
+DATA_FILE_NAME = "gis_indicator_values.csv"
+CSV_ENCODING = "utf-8-sig"
+COLUMNS_FILE_NAME = "gis_indicator_values.columns"
+MANIFEST_FILE_NAME = "gis_indicator_values.manifest.json"
+COLUMNS_MAGIC = b"IPCOLS01"
+COLUMNS_FORMAT = "ipoor-columns"
+COLUMNS_FORMAT_VERSION = 1
+COLUMN_ALIGNMENT = 8
+STRING_POOLS = ("indicators", "metrics", "geo_versions", "geo_codes", "geo_names")
+ARRAY_COLUMNS = (
+    "indicator_col",
+    "metric_col",
+    "geo_version_col",
+    "geo_code_col",
+    "geo_name_col",
+    "year_col",
+    "value_col",
+)
+
+FIELD_INDICATOR = "indicator_code"
+FIELD_INDICATOR_TITLE = "indicator_title"
+FIELD_METRIC = "metric"
+FIELD_YEAR = "year"
+FIELD_VALUE = "value"
+FIELD_GEO_VERSION = "geo_version"
+FIELD_GEO_CODE = "geo_code"
+FIELD_GEO_NAME = "geo_name"
+
+IndexKey = tuple[int, int, int]
+
+
+def get_processed_dir() -> Path:
+    here = Path(__file__).resolve()
+    for parent in here.parents:
+        if (parent / "FE" / "data").exists():
+            return parent / "FE" / "data" / "processed"
+    return here.parents[3] / "FE" / "data" / "processed"
+
+
+def get_data_path() -> Path:
+    return get_processed_dir() / DATA_FILE_NAME
+
+
+def get_columns_paths(data_path: Path) -> tuple[Path, Path]:
+    return data_path.with_name(COLUMNS_FILE_NAME), data_path.with_name(MANIFEST_FILE_NAME)
+
+
+class StringPool:
+    """Interns repeated strings so columns can store small integer ids."""
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self.ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: int) -> str:
+        return self.values[index]
+
+    def intern(self, value: str) -> int:
+        index = self.ids.get(value)
+        if index is None:
+            index = len(self.values)
+            self.values.append(value)
+            self.ids[value] = index
+        return index
+
+    def lookup(self, value: str | None) -> int | None:
+        if value is None:
+            return None
+        return self.ids.get(value)
+
+
+class IndicatorSummary:
+    def __init__(self, indicator_code: str, indicator_title: str) -> None:
+        self.indicator_code = indicator_code
+        self.indicator_title = indicator_title
+        self.metrics: list[str] = []
+        self.years: list[int] = []
+        self.geo_versions: list[str] = []
+
+
+class IndicatorStore:
+    """Column-oriented, read-only copy of gis_indicator_values.csv.
+
+    Rows are addressed by position. ``build_index`` must run once after the
+    last ``append`` so lookups go through the (indicator, metric, geo_version)
+    index rather than scanning the columns. A store opened from the columnar
+    artifact holds read-only memoryviews over the mapped file instead of
+    arrays, and cannot be appended to.
+    """
+
+    def __init__(self, version: str = "") -> None:
+        self.version = version
+        self.indicators = StringPool()
+        self.metrics = StringPool()
+        self.geo_versions = StringPool()
+        self.geo_codes = StringPool()
+        self.geo_names = StringPool()
+        self.indicator_titles: dict[str, str] = {}
+
+        self.indicator_col = array("H")
+        self.metric_col = array("H")
+        self.geo_version_col = array("H")
+        self.geo_code_col = array("H")
+        self.geo_name_col = array("H")
+        self.year_col = array("H")
+        self.value_col = array("d")
+
+        self.geo_keys: list[str] = []
+        self.by_year: dict[IndexKey, dict[int, list[int]]] = {}
+        self.by_geo: dict[IndexKey, dict[str, list[int]]] = {}
+        self.metric_ids: dict[tuple[int, int], list[int]] = {}
+        self.summaries: dict[str, IndicatorSummary] = {}
+        self.geo_codes_by_version: dict[str, list[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.value_col)
+
+    def append(
+        self,
+        indicator_code: str,
+        metric: str,
+        geo_version: str,
+        geo_code: str,
+        geo_name: str,
+        year: int,
+        value: float,
+    ) -> None:
+        self.indicator_col.append(self.indicators.intern(indicator_code))
+        self.metric_col.append(self.metrics.intern(metric))
+        self.geo_version_col.append(self.geo_versions.intern(geo_version))
+        self.geo_code_col.append(self.geo_codes.intern(geo_code))
+        self.geo_name_col.append(self.geo_names.intern(geo_name))
+        self.year_col.append(year)
+        self.value_col.append(value)
+
+    def indicator_at(self, position: int) -> str:
+        return self.indicators[self.indicator_col[position]]
+
+    def metric_at(self, position: int) -> str:
+        return self.metrics[self.metric_col[position]]
+
+    def geo_code_at(self, position: int) -> str:
+        return self.geo_codes[self.geo_code_col[position]]
+
+    def geo_name_at(self, position: int) -> str:
+        return self.geo_names[self.geo_name_col[position]]
+
+    def year_at(self, position: int) -> int:
+        return self.year_col[position]
+
+    def value_at(self, position: int) -> float:
+        return self.value_col[position]
+
+    def geo_key_at(self, position: int) -> str:
+        return self.geo_keys[self.geo_name_col[position]]
+
+    def build_index(self) -> None:
+        self.geo_keys = [normalize_location(name) for name in self.geo_names.values]
+        by_year: dict[IndexKey, dict[int, list[int]]] = {}
+        by_geo: dict[IndexKey, dict[str, list[int]]] = {}
+        metric_ids: dict[tuple[int, int], set[int]] = {}
+        summary_sets: dict[int, tuple[set[int], set[int], set[int]]] = {}
+        geo_code_sets: dict[int, set[int]] = {}
+        for position in range(len(self)):
+            indicator_id = self.indicator_col[position]
+            metric_id = self.metric_col[position]
+            geo_version_id = self.geo_version_col[position]
+            year = self.year_col[position]
+            key = (indicator_id, metric_id, geo_version_id)
+            by_year.setdefault(key, {}).setdefault(year, []).append(position)
+            geo_key = self.geo_keys[self.geo_name_col[position]]
+            by_geo.setdefault(key, {}).setdefault(geo_key, []).append(position)
+            metric_ids.setdefault((indicator_id, geo_version_id), set()).add(metric_id)
+            metrics, years, geo_versions = summary_sets.setdefault(
+                indicator_id, (set(), set(), set())
+            )
+            metrics.add(metric_id)
+            years.add(year)
+            geo_versions.add(geo_version_id)
+            geo_code_sets.setdefault(geo_version_id, set()).add(self.geo_code_col[position])
+
+        summaries: dict[str, IndicatorSummary] = {}
+        for indicator_id, (metrics, years, geo_versions) in summary_sets.items():
+            code = self.indicators[indicator_id]
+            summary = IndicatorSummary(code, self.indicator_titles.get(code, ""))
+            summary.metrics = sorted(name for name in (self.metrics[i] for i in metrics) if name)
+            summary.years = sorted(year for year in years if year)
+            summary.geo_versions = sorted(
+                name for name in (self.geo_versions[i] for i in geo_versions) if name
+            )
+            summaries[code] = summary
+
+        self.by_year = by_year
+        self.by_geo = by_geo
+        self.metric_ids = {key: sorted(ids) for key, ids in metric_ids.items()}
+        self.summaries = summaries
+        self.geo_codes_by_version = {
+            self.geo_versions[geo_version_id]: sorted(
+                code for code in (self.geo_codes[i] for i in code_ids) if code
+            )
+            for geo_version_id, code_ids in geo_code_sets.items()
+        }
+
+    def _index_keys(
+        self,
+        indicator_code: str,
+        geo_version: str,
+        metric: str | None,
+    ) -> list[IndexKey]:
+        indicator_id = self.indicators.lookup(indicator_code)
+        geo_version_id = self.geo_versions.lookup(geo_version)
+        if indicator_id is None or geo_version_id is None:
+            return []
+        if metric:
+            metric_id = self.metrics.lookup(metric)
+            if metric_id is None:
+                return []
+            return [(indicator_id, metric_id, geo_version_id)]
+        return [
+            (indicator_id, metric_id, geo_version_id)
+            for metric_id in self.metric_ids.get((indicator_id, geo_version_id), [])
+        ]
+
+    def select(
+        self,
+        indicator_code: str,
+        geo_version: str,
+        metric: str | None = None,
+        year: int | None = None,
+        geo_keys: set[str] | None = None,
+    ) -> list[int]:
+        """Return row positions, in file order, matching every given key."""
+        positions: list[int] = []
+        for key in self._index_keys(indicator_code, geo_version, metric):
+            if geo_keys is not None:
+                by_geo = self.by_geo.get(key, {})
+                for geo_key in geo_keys:
+                    positions.extend(
+                        position
+                        for position in by_geo.get(geo_key, [])
+                        if year is None or self.year_col[position] == year
+                    )
+            elif year is not None:
+                positions.extend(self.by_year.get(key, {}).get(year, []))
+            else:
+                for year_positions in self.by_year.get(key, {}).values():
+                    positions.extend(year_positions)
+        positions.sort()
+        return positions
+
+
+def parse_indicator_csv(raw: bytes, version: str) -> IndicatorStore:
+    store = IndicatorStore(version=version)
+    with io.StringIO(raw.decode(CSV_ENCODING)) as handle:
+        for row in csv.DictReader(handle):
+            indicator_code = (row.get(FIELD_INDICATOR) or "").strip()
+            if not indicator_code:
+                continue
+            try:
+                year = int(row.get(FIELD_YEAR) or 0)
+                value = float(row.get(FIELD_VALUE) or 0)
+            except (TypeError, ValueError):
+                continue
+            if indicator_code not in store.indicator_titles:
+                store.indicator_titles[indicator_code] = row.get(FIELD_INDICATOR_TITLE) or ""
+            store.append(
+                indicator_code,
+                row.get(FIELD_METRIC) or "",
+                row.get(FIELD_GEO_VERSION) or "",
+                row.get(FIELD_GEO_CODE) or "",
+                (row.get(FIELD_GEO_NAME) or "").strip(),
+                year,
+                value,
+            )
+    store.build_index()
+    return store
+
+
+def align(offset: int) -> int:
+    return offset + (-offset % COLUMN_ALIGNMENT)
+
+
+def write_indicator_columns(store: IndicatorStore, data_path: Path) -> dict[str, Any]:
+    """Write the columnar artifact and manifest next to ``data_path``.
+
+    File layout: ``COLUMNS_MAGIC``, a uint32 little-endian length, a JSON
+    header (string pools, indicator titles and each column's typecode,
+    offset and length), then every column as raw native-endian array bytes
+    at ``COLUMN_ALIGNMENT``-aligned offsets. The manifest records the CSV
+    hash the artifact was built from, so a stale artifact is never used.
+    """
+    columns_path, manifest_path = get_columns_paths(data_path)
+    columns = {name: getattr(store, name) for name in ARRAY_COLUMNS}
+    header: dict[str, Any] = {
+        "rows": len(store),
+        "pools": {name: list(getattr(store, name).values) for name in STRING_POOLS},
+        "indicator_titles": store.indicator_titles,
+        "columns": {},
+    }
+    # Offsets are relative to the data section so the header size is known up front.
+    offset = 0
+    for name, column in columns.items():
+        offset = align(offset)
+        header["columns"][name] = [column.typecode, offset, len(column)]
+        offset += len(column) * column.itemsize
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = align(len(COLUMNS_MAGIC) + 4 + len(header_bytes))
+
+    temp_path = columns_path.with_name(f"{columns_path.name}.{os.getpid()}.tmp")
+    with temp_path.open("wb") as handle:
+        handle.write(COLUMNS_MAGIC)
+        handle.write(struct.pack("<I", len(header_bytes)))
+        handle.write(header_bytes)
+        for name, column in columns.items():
+            position = data_start + header["columns"][name][1]
+            handle.write(b"\0" * (position - handle.tell()))
+            column.tofile(handle)
+    os.replace(temp_path, columns_path)
+
+    manifest = {
+        "format": COLUMNS_FORMAT,
+        "format_version": COLUMNS_FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "rows": len(store),
+        "source": data_path.name,
+        "source_sha256": store.version,
+        "columns_file": columns_path.name,
+        "sha256": hashlib.sha256(columns_path.read_bytes()).hexdigest(),
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def open_indicator_columns(data_path: Path, version: str) -> IndicatorStore | None:
+    """Memory-map the columnar artifact if its manifest matches CSV ``version``.
+
+    Returns None when the artifact is missing, stale or unreadable, in which
+    case the caller parses the CSV instead.
+    """
+    columns_path, manifest_path = get_columns_paths(data_path)
+    if not manifest_path.exists() or not columns_path.exists():
+        return None
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if (
+        manifest.get("format") != COLUMNS_FORMAT
+        or manifest.get("format_version") != COLUMNS_FORMAT_VERSION
+        or manifest.get("byteorder") != sys.byteorder
+        or manifest.get("source_sha256") != version
+    ):
+        return None
+
+    with columns_path.open("rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    if hashlib.sha256(mapped).hexdigest() != manifest.get("sha256"):
+        mapped.close()
+        return None
+    if mapped[: len(COLUMNS_MAGIC)] != COLUMNS_MAGIC:
+        mapped.close()
+        return None
+    header_start = len(COLUMNS_MAGIC) + 4
+    (header_length,) = struct.unpack_from("<I", mapped, len(COLUMNS_MAGIC))
+    header = json.loads(mapped[header_start : header_start + header_length])
+    data_start = align(header_start + header_length)
+
+    store = IndicatorStore(version=version)
+    for name in STRING_POOLS:
+        pool = getattr(store, name)
+        for value in header["pools"][name]:
+            pool.intern(value)
+    store.indicator_titles = header["indicator_titles"]
+    # The memoryviews keep the mapping alive for as long as the store exists.
+    view = memoryview(mapped)
+    for name in ARRAY_COLUMNS:
+        typecode, offset, length = header["columns"][name]
+        start = data_start + offset
+        end = start + length * array(typecode).itemsize
+        setattr(store, name, view[start:end].cast(typecode))
+    store.build_index()
+    return store
+
+
+def read_indicator_csv(path: Path) -> IndicatorStore:
+    raw = path.read_bytes()
+    return parse_indicator_csv(raw, hashlib.sha256(raw).hexdigest())
+
+
+def load_indicator_store(path: Path) -> IndicatorStore:
+    raw = path.read_bytes()
+    version = hashlib.sha256(raw).hexdigest()
+    store = open_indicator_columns(path, version)
+    if store is not None:
+        return store
+    return parse_indicator_csv(raw, version)
+
+
+_STORE_WATCH = WatchedDataset(
+    lambda: [get_data_path(), get_columns_paths(get_data_path())[1]],
+    lambda: load_indicator_store(get_data_path()),
+)
+
+
+def get_indicator_store() -> IndicatorStore:
+    """Return the process-wide store; raises FileNotFoundError if the CSV is missing."""
+    return _STORE_WATCH.get()
+
+
+def refresh_indicator_store() -> IndicatorStore:
+    return _STORE_WATCH.refresh()
@@ -0,0 +1,250 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import get_settings
+from ..constants import JobKind, JobStatus
+from ..database import SessionLocal
+
+JOB_PROGRESS_INTERVAL_SECONDS = 1.0
+# Live jobs are touched this often; queued/running rows not touched for
+# JOB_STALE_SECONDS belong to a process that died and are failed by any other.
+JOB_HEARTBEAT_SECONDS = 30
+JOB_STALE_SECONDS = 5 * JOB_HEARTBEAT_SECONDS
+JOB_RESULT_RETENTION_DAYS = 7
+JOB_RESULTS_SUBDIR = "results"
+JOB_FAILED_MESSAGE = "Job failed"
+JOB_INTERRUPTED_MESSAGE = "Interrupted by shutdown"
+JOB_LOST_MESSAGE = "Interrupted: worker process stopped"
+ACTIVE_JOB_STATUSES = (JobStatus.QUEUED, JobStatus.RUNNING)
+
+# task(db, progress, *args) -> JSON-serialisable result stored on the job.
+JobTask = Callable[..., Any]
+
+logger = logging.getLogger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_pending: dict[str, Future] = {}
+_pending_lock = threading.Lock()
+_heartbeat: threading.Thread | None = None
+_heartbeat_stop = threading.Event()
+
+
+def update_job(job_id: str, **values: Any) -> None:
+    # Own short transaction, so progress is visible while the task's session is busy.
+    with SessionLocal() as db:
+        db.execute(update(models.Job).where(models.Job.id == job_id).values(**values))
+        db.commit()
+
+
+class JobProgress:
+    """Counts a job's work and writes it to the row at most once per interval."""
+
+    def __init__(self, job_id: str) -> None:
+        self.job_id = job_id
+        self.total: int | None = None
+        self.processed = 0
+        self.failed = 0
+        self.flushed_at = 0.0
+
+    def set_total(self, total: int) -> None:
+        self.total = total
+        self.flush()
+
+    def advance(self, processed: int = 1, failed: int = 0) -> None:
+        self.processed += processed
+        self.failed += failed
+        if time.monotonic() - self.flushed_at >= JOB_PROGRESS_INTERVAL_SECONDS:
+            self.flush()
+
+    def values(self) -> dict[str, int | None]:
+        return {"total": self.total, "processed": self.processed, "failed": self.failed}
+
+    def flush(self) -> None:
+        self.flushed_at = time.monotonic()
+        update_job(self.job_id, **self.values())
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+def get_job_dir(job_id: str) -> Path:
+    """Scratch directory for a job's inputs; removed when the job finishes."""
+    return Path(get_settings().job_dir) / job_id
+
+
+def get_result_path(job_id: str) -> Path:
+    return Path(get_settings().job_dir) / JOB_RESULTS_SUBDIR / f"{job_id}.json"
+
+
+def save_result(job_id: str, result: Any) -> Any:
+    """Write the full result next to the jobs and return the summary kept on the row.
+
+    Per-row results of a large upload can outgrow a JSON column (and
+    max_allowed_packet); the row only keeps the top-level scalar fields.
+    """
+    path = get_result_path(job_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".tmp")
+    with partial.open("w", encoding="utf-8") as output:
+        json.dump(result, output, ensure_ascii=False)
+    os.replace(partial, path)
+    if not isinstance(result, dict):
+        return None
+    return {key: value for key, value in result.items() if not isinstance(value, (list, dict))}
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, get_settings().job_workers),
+                thread_name_prefix="job",
+            )
+        return _executor
+
+
+def run_job(job_id: str, task: JobTask, args: tuple[Any, ...]) -> None:
+    progress = JobProgress(job_id)
+    update_job(job_id, status=JobStatus.RUNNING, started_at=datetime.utcnow())
+    outcome: dict[str, Any]
+    try:
+        with SessionLocal() as db:
+            result = task(db, progress, *args)
+        outcome = {"status": JobStatus.SUCCEEDED, "result": save_result(job_id, result)}
+    except HTTPException as exc:
+        outcome = {"status": JobStatus.FAILED, "error": str(exc.detail)}
+    except Exception:
+        logger.exception("Job %s failed", job_id)
+        outcome = {"status": JobStatus.FAILED, "error": JOB_FAILED_MESSAGE}
+    finally:
+        shutil.rmtree(get_job_dir(job_id), ignore_errors=True)
+    update_job(job_id, finished_at=datetime.utcnow(), **progress.values(), **outcome)
+
+
+def submit_job(
+    db: Session,
+    job_id: str,
+    user_id: int,
+    kind: JobKind,
+    task: JobTask,
+    *args: Any,
+) -> models.Job:
+    """Record a queued job and hand ``task`` to the worker pool.
+
+    Inputs the task reads from disk must already be in ``get_job_dir(job_id)``.
+    """
+    job = models.Job(id=job_id, user_id=user_id, kind=kind, status=JobStatus.QUEUED)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    with _pending_lock:
+        future = get_executor().submit(run_job, job_id, task, args)
+        _pending[job_id] = future
+    future.add_done_callback(lambda _: forget_job(job_id))
+    return job
+
+
+def forget_job(job_id: str) -> None:
+    with _pending_lock:
+        _pending.pop(job_id, None)
+
+
+def touch_pending_jobs() -> None:
+    with _pending_lock:
+        job_ids = list(_pending)
+    if not job_ids:
+        return
+    with SessionLocal() as db:
+        db.execute(
+            update(models.Job)
+            .where(models.Job.id.in_(job_ids), models.Job.status.in_(ACTIVE_JOB_STATUSES))
+            .values(updated_at=datetime.utcnow())
+        )
+        db.commit()
+
+
+def fail_stale_jobs() -> None:
+    """Fail queued/running jobs whose process stopped heartbeating (crash, kill -9)."""
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+    with SessionLocal() as db:
+        db.execute(
+            update(models.Job)
+            .where(models.Job.status.in_(ACTIVE_JOB_STATUSES), models.Job.updated_at < cutoff)
+            .values(status=JobStatus.FAILED, error=JOB_LOST_MESSAGE, finished_at=datetime.utcnow())
+        )
+        db.commit()
+
+
+def prune_results() -> None:
+    results_dir = Path(get_settings().job_dir) / JOB_RESULTS_SUBDIR
+    if not results_dir.is_dir():
+        return
+    cutoff = time.time() - JOB_RESULT_RETENTION_DAYS * 86400
+    for path in results_dir.iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+        except FileNotFoundError:
+            continue
+
+
+def run_heartbeat() -> None:
+    while True:
+        try:
+            touch_pending_jobs()
+            fail_stale_jobs()
+            prune_results()
+        except Exception:
+            logger.exception("Job heartbeat failed")
+        if _heartbeat_stop.wait(JOB_HEARTBEAT_SECONDS):
+            return
+
+
+def start_jobs() -> None:
+    """Start the heartbeat; its first pass fails jobs left over by a dead process."""
+    global _heartbeat
+    if _heartbeat is not None:
+        return
+    _heartbeat_stop.clear()
+    _heartbeat = threading.Thread(target=run_heartbeat, name="job-heartbeat", daemon=True)
+    _heartbeat.start()
+
+
+def shutdown_jobs() -> None:
+    """Drop queued jobs, marking them failed; running ones are left to finish."""
+    global _executor, _heartbeat
+    _heartbeat_stop.set()
+    _heartbeat = None
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is None:
+        return
+    with _pending_lock:
+        pending = list(_pending.items())
+    for job_id, future in pending:
+        if future.cancel():
+            shutil.rmtree(get_job_dir(job_id), ignore_errors=True)
+            update_job(
+                job_id,
+                status=JobStatus.FAILED,
+                error=JOB_INTERRUPTED_MESSAGE,
+                finished_at=datetime.utcnow(),
+            )
+    executor.shutdown(wait=False)
@@ -0,0 +1,69 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Sequence, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+Q = TypeVar("Q")
+T = TypeVar("T")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != size:
+            raise ValueError(cursor)
+        values: list[Any] = []
+        for value in payload:
+            if isinstance(value, str):
+                values.append(datetime.fromisoformat(value))
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                values.append(value)
+            else:
+                raise ValueError(cursor)
+        return values
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def apply_keyset(
+    query: Q,
+    keys: Sequence[Any],
+    cursor: str | None,
+    limit: int,
+    descending: bool = True,
+) -> Q:
+    """Order ``query`` by ``keys`` and, given a cursor, continue after it.
+
+    ``keys`` must be unique together (end with the primary key). One extra row
+    is fetched so ``split_page`` can tell whether another page exists. Works
+    for both ``Query`` and ``select()``.
+    """
+    if cursor:
+        row = tuple_(*keys)
+        after = tuple_(*decode_cursor(cursor, len(keys)))
+        query = query.where(row < after if descending else row > after)
+    order = [key.desc() if descending else key.asc() for key in keys]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def split_page(
+    rows: Sequence[T], limit: int, key: Callable[[T], Sequence[Any]]
+) -> tuple[list[T], str | None]:
+    """Return the page and the cursor of the next one (None on the last page)."""
+    if len(rows) <= limit:
+        return list(rows), None
+    items = list(rows[:limit])
+    return items, encode_cursor(key(items[-1]))
@@ -1,13 +1,30 @@
+import asyncio
+import hashlib
+import multiprocessing
+import secrets
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
 
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 
 from ..config import get_settings
 
 BCRYPT_MAX_BYTES = 72
+REFRESH_TOKEN_BYTES = 32
+PASSWORD_BUSY_RETRY_AFTER_SECONDS = 1
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Hashing runs here once the app has started the pool; scripts and
+# migrations, which never start it, hash inline.
+_password_pool: ProcessPoolExecutor | None = None
+_password_slots: threading.BoundedSemaphore | None = None
+_password_pool_lock = threading.Lock()
+
 
 def _clamp_password(password: str) -> str:
     """bcrypt ignores bytes after 72; clamp to avoid runtime errors."""
@@ -17,18 +34,145 @@ def _clamp_password(password: str) -> str:
     return encoded[:BCRYPT_MAX_BYTES].decode("utf-8", errors="ignore")
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+def _hash_password(password: str) -> str:
     safe_password = _clamp_password(password)
     return pwd_context.hash(safe_password)
 
 
+def new_password_pool(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        # Forking a process that already runs threads is unsafe.
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def start_password_pool() -> None:
+    """Move bcrypt off the event loop and the request threadpool into worker processes."""
+    global _password_pool, _password_slots
+    settings = get_settings()
+    if _password_pool is not None or settings.password_hash_workers <= 0:
+        return
+    _password_slots = threading.BoundedSemaphore(
+        settings.password_hash_workers + max(0, settings.password_hash_queue)
+    )
+    _password_pool = new_password_pool(settings.password_hash_workers)
+
+
+def shutdown_password_pool() -> None:
+    global _password_pool, _password_slots
+    pool, _password_pool, _password_slots = _password_pool, None, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def restart_password_pool(broken: ProcessPoolExecutor) -> None:
+    """Replace ``broken`` after a worker died (OOM kill, segfault).
+
+    A ProcessPoolExecutor never recovers from that on its own; every later
+    submit would raise BrokenProcessPool until the app restarts. Only the
+    first caller that saw ``broken`` rebuilds it.
+    """
+    global _password_pool
+    with _password_pool_lock:
+        if _password_pool is not broken:
+            return
+        _password_pool = new_password_pool(get_settings().password_hash_workers)
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(function: Callable[..., Any], *args: Any) -> tuple[ProcessPoolExecutor, Future] | None:
+    """Queue ``function`` on the pool; None when there is no pool.
+
+    Raises 503 rather than queueing more than PASSWORD_HASH_QUEUE calls
+    behind the busy workers.
+    """
+    pool, slots = _password_pool, _password_slots
+    if pool is None or slots is None:
+        return None
+    if not slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry",
+            headers={"Retry-After": str(PASSWORD_BUSY_RETRY_AFTER_SECONDS)},
+        )
+    try:
+        try:
+            future = pool.submit(function, *args)
+        except BrokenProcessPool:
+            restart_password_pool(pool)
+            pool = _password_pool
+            if pool is None:
+                raise
+            future = pool.submit(function, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return pool, future
+
+
+def _run(function: Callable[..., Any], *args: Any) -> Any:
+    for attempt in range(2):
+        submitted = _submit(function, *args)
+        if submitted is None:
+            return function(*args)
+        pool, future = submitted
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # The worker died mid-call; rebuild the pool and retry once.
+            restart_password_pool(pool)
+            if attempt:
+                raise
+
+
+async def _run_async(function: Callable[..., Any], *args: Any) -> Any:
+    for attempt in range(2):
+        submitted = _submit(function, *args)
+        if submitted is None:
+            return await asyncio.to_thread(function, *args)
+        pool, future = submitted
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            restart_password_pool(pool)
+            if attempt:
+                raise
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return _run(_verify_password, plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return _run(_hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_async(_verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_async(_hash_password, password)
+
+
 def create_access_token(subject: str, expires_minutes: int | None = None) -> str:
     settings = get_settings()
     expire_delta = expires_minutes or settings.jwt_expire_minutes
     expire = datetime.now(timezone.utc) + timedelta(minutes=expire_delta)
     payload = {"sub": subject, "exp": expire}
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
+
+
+def create_refresh_token() -> str:
+    return secrets.token_urlsafe(REFRESH_TOKEN_BYTES)
+
+
+def hash_refresh_token(token: str) -> str:
+    # Tokens are random, so a fast digest is enough; bcrypt would defeat the point.
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
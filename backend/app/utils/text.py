@@ -1,5 +1,12 @@
+import html
+import re
 from typing import Any
-from unicodedata import normalize
+from unicodedata import combining, normalize
+
+HTML_TAG_PATTERN = re.compile(r"<[^>]+>")
+SEARCH_SEPARATOR_PATTERN = re.compile(r"[\W_]+")
+# Editor.js block data that holds settings or file references rather than prose.
+BLOCK_SKIP_KEYS = {"file", "url", "link", "style", "alignment", "level", "withBorder", "stretched"}
 
 
 def normalize_text(value: Any) -> str:
@@ -18,3 +25,45 @@ def normalize_header(value: Any) -> str:
 
 def normalize_search_text(value: Any) -> str:
     return normalize_text(value).casefold()
+
+
+def fold_search_text(value: Any) -> str:
+    """Lowercase, drop Vietnamese diacritics (including đ) and punctuation: "Hộ nghèo" -> "ho ngheo"."""
+    text = normalize("NFD", normalize_text(value).casefold().replace("đ", "d"))
+    text = "".join(char for char in text if not combining(char))
+    return " ".join(SEARCH_SEPARATOR_PATTERN.sub(" ", text).split())
+
+
+def strip_html(value: str) -> str:
+    return html.unescape(HTML_TAG_PATTERN.sub(" ", value))
+
+
+def extract_block_text(blocks: Any) -> list[str]:
+    """Plain text of Editor.js ``content_blocks``, without markup."""
+    texts: list[str] = []
+
+    def walk(value: Any) -> None:
+        if isinstance(value, str):
+            texts.append(strip_html(value))
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if key not in BLOCK_SKIP_KEYS:
+                    walk(item)
+
+    if isinstance(blocks, dict):
+        for block in blocks.get("blocks", []):
+            if isinstance(block, dict):
+                walk(block.get("data"))
+    return texts
+
+
+def normalize_location(value: str) -> str:
+    text = normalize("NFC", value).lower()
+    text = text.replace(".", "")
+    text = re.sub(r"thanh\s*pho\s*", "tp ", text)
+    text = re.sub(r"tp\s*", "tp ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
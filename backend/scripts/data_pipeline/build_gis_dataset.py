@@ -1,9 +1,14 @@
 import csv
 import json
+import sys
 from pathlib import Path
 from typing import Any
 from unicodedata import normalize
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.utils.indicator_store import read_indicator_csv, write_indicator_columns  # noqa: E402
+
 
 GEOJSON_FILES = {
     "old_63": "Việt Nam (tỉnh thành) - 63.geojson",
@@ -48,71 +53,94 @@ def load_geo_map(path: Path) -> dict[str, dict[str, str]]:
     return mapping
 
 
-def main() -> None:
+FIELDNAMES = [
+    "indicator_code",
+    "indicator_title",
+    "metric",
+    "year",
+    "value",
+    "geo_version",
+    "geo_code",
+    "geo_name",
+]
+
+
+def get_data_dir() -> Path:
     root = Path(__file__).resolve().parents[2]
-    data_dir = root.parent / "FE" / "data"
-    processed_dir = data_dir / "processed"
+    return root.parent / "FE" / "data"
 
-    geo_maps = {
+
+def load_geo_maps(data_dir: Path) -> dict[str, dict[str, dict[str, str]]]:
+    return {
         key: load_geo_map(data_dir / filename)
         for key, filename in GEOJSON_FILES.items()
     }
 
+
+def read_group_rows(
+    csv_path: Path,
+    geo_maps: dict[str, dict[str, dict[str, str]]],
+) -> list[dict[str, str]]:
+    rows_out: list[dict[str, str]] = []
+    with csv_path.open(encoding="utf-8-sig") as handle:
+        reader = csv.DictReader(handle)
+        for row in reader:
+            geo_version = row.get("geo_version", "old_63")
+            geo_name = row.get("geo_name", "")
+            geo_key = normalize_text(geo_name)
+            geo_map = geo_maps.get(geo_version)
+            if not geo_map:
+                continue
+            geo_meta = geo_map.get(geo_key)
+            if not geo_meta:
+                continue
+            value = row.get("value")
+            if value is None or value == "":
+                continue
+            rows_out.append(
+                {
+                    "indicator_code": row.get("indicator_code", ""),
+                    "indicator_title": row.get("indicator_title", ""),
+                    "metric": row.get("metric", ""),
+                    "year": row.get("year", ""),
+                    "value": value,
+                    "geo_version": geo_version,
+                    "geo_code": geo_meta["geo_code"],
+                    "geo_name": geo_meta["geo_name"],
+                }
+            )
+    return rows_out
+
+
+def build_dataset(data_dir: Path) -> Path:
+    processed_dir = data_dir / "processed"
+    geo_maps = load_geo_maps(data_dir)
+
     output_path = processed_dir / OUTPUT_FILE
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    fieldnames = [
-        "indicator_code",
-        "indicator_title",
-        "metric",
-        "year",
-        "value",
-        "geo_version",
-        "geo_code",
-        "geo_name",
-    ]
-
     rows_out: list[dict[str, str]] = []
-
     for filename in PROCESSED_FILES:
         csv_path = processed_dir / filename
         if not csv_path.exists():
             continue
-        with csv_path.open(encoding="utf-8-sig") as handle:
-            reader = csv.DictReader(handle)
-            for row in reader:
-                geo_version = row.get("geo_version", "old_63")
-                geo_name = row.get("geo_name", "")
-                geo_key = normalize_text(geo_name)
-                geo_map = geo_maps.get(geo_version)
-                if not geo_map:
-                    continue
-                geo_meta = geo_map.get(geo_key)
-                if not geo_meta:
-                    continue
-                value = row.get("value")
-                if value is None or value == "":
-                    continue
-                rows_out.append(
-                    {
-                        "indicator_code": row.get("indicator_code", ""),
-                        "indicator_title": row.get("indicator_title", ""),
-                        "metric": row.get("metric", ""),
-                        "year": row.get("year", ""),
-                        "value": value,
-                        "geo_version": geo_version,
-                        "geo_code": geo_meta["geo_code"],
-                        "geo_name": geo_meta["geo_name"],
-                    }
-                )
+        rows_out.extend(read_group_rows(csv_path, geo_maps))
 
     with output_path.open("w", encoding="utf-8-sig", newline="") as handle:
-        writer = csv.DictWriter(handle, fieldnames=fieldnames)
+        writer = csv.DictWriter(handle, fieldnames=FIELDNAMES)
         writer.writeheader()
         writer.writerows(rows_out)
 
     print(f"Wrote {len(rows_out)} rows to {output_path}")
 
+    manifest = write_indicator_columns(read_indicator_csv(output_path), output_path)
+    print(f"Wrote {manifest['rows']} rows to {output_path.with_name(manifest['columns_file'])}")
+    return output_path
+
+
+def main() -> None:
+    build_dataset(get_data_dir())
+
 
 if __name__ == "__main__":
     main()
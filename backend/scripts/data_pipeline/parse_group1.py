@@ -10,6 +10,19 @@ import openpyxl
 
 
 YEAR_PATTERN = re.compile(r"(19|20)\d{2}")
+DEFAULT_WORKBOOK = "FE/data/So lieu ve ban do 27 Nov 2025_2.xlsx"
+FIELDNAMES = [
+    "sheet",
+    "indicator_code",
+    "indicator_title",
+    "geo_name",
+    "geo_parent",
+    "section",
+    "metric",
+    "year",
+    "value",
+    "geo_version",
+]
 
 
 def normalize_text(value: Any) -> str:
@@ -347,40 +360,35 @@ def parse_sheet(
     return rows_out
 
 
+def read_section_headers(config: dict[str, Any]) -> set[str]:
+    return {normalize_text(value).lower() for value in config["section_headers"]}
+
+
+def write_rows(output_path: Path, rows_out: list[dict[str, Any]]) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("w", encoding="utf-8-sig", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows_out)
+
+
 def main() -> None:
     root = Path(__file__).resolve().parents[2]
     config_path = root / "scripts" / "data_pipeline" / "group1_config.json"
     if len(sys.argv) > 1:
         config_path = Path(sys.argv[1])
     config = read_config(config_path)
-    workbook_path = root.parent / "FE" / "data" / "So lieu ve ban do 27 Nov 2025_2.xlsx"
+    workbook_path = root.parent / DEFAULT_WORKBOOK
     output_path = root.parent / config["output"]
-    output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    section_headers = {normalize_text(value).lower() for value in config["section_headers"]}
+    section_headers = read_section_headers(config)
     wb = openpyxl.load_workbook(workbook_path, data_only=True, read_only=True)
 
     rows_out: list[dict[str, Any]] = []
     for sheet_cfg in config["sheets"]:
         rows_out.extend(parse_sheet(wb, sheet_cfg, section_headers))
 
-    fieldnames = [
-        "sheet",
-        "indicator_code",
-        "indicator_title",
-        "geo_name",
-        "geo_parent",
-        "section",
-        "metric",
-        "year",
-        "value",
-        "geo_version",
-    ]
-
-    with output_path.open("w", encoding="utf-8-sig", newline="") as handle:
-        writer = csv.DictWriter(handle, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows_out)
+    write_rows(output_path, rows_out)
 
     print(f"Wrote {len(rows_out)} rows to {output_path}")
 
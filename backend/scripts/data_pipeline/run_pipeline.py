@@ -0,0 +1,268 @@
+"""Incremental, parallel runner for the GIS indicator pipeline.
+
+Parses every sheet of every ``groupN_config.json`` in a process pool and
+skips sheets whose fingerprint is unchanged since the last run. A sheet's
+fingerprint covers its sheet config and section headers, the sheet's own XML
+part inside the workbook (plus the shared strings and styles parts), and the
+parser source. Parsed sheets are cached as CSV, so a group's output is
+reassembled from cache. ``gis_indicator_values.csv`` is only rebuilt when a
+group output, the merge script or the GeoJSON files changed.
+
+Usage: python run_pipeline.py [--workbook PATH] [--jobs N] [--force] [config ...]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import posixpath
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+from xml.etree import ElementTree
+
+import openpyxl
+
+import build_gis_dataset
+import parse_group1
+
+STATE_FILE = "pipeline_state.json"
+STATE_VERSION = 1
+CACHE_DIR = ".pipeline_cache"
+SHARED_WORKBOOK_PARTS = ("xl/sharedStrings.xml", "xl/styles.xml")
+SHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT = SCRIPT_DIR.parents[1]
+DATA_DIR = ROOT.parent / "FE" / "data"
+PROCESSED_DIR = DATA_DIR / "processed"
+
+_WORKBOOKS: dict[tuple[str, int], openpyxl.Workbook] = {}
+
+
+def sha256_bytes(*parts: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else ""
+
+
+def read_sheet_parts(workbook_path: Path) -> tuple[dict[str, str], str]:
+    """Return ({sheet name: digest of its XML part}, digest of the shared parts).
+
+    Falls back to hashing the whole file for every sheet when the workbook
+    cannot be read as an xlsx package.
+    """
+    try:
+        with zipfile.ZipFile(workbook_path) as archive:
+            rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+            targets = {
+                rel.get("Id"): rel.get("Target", "")
+                for rel in rels.iter(f"{{{PACKAGE_REL_NS}}}Relationship")
+            }
+            workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+            names = set(archive.namelist())
+            sheets: dict[str, str] = {}
+            for sheet in workbook.iter(f"{{{SHEET_NS}}}sheet"):
+                target = targets.get(sheet.get(f"{{{REL_NS}}}id"), "")
+                part = target.lstrip("/") if target.startswith("/") else posixpath.join("xl", target)
+                part = posixpath.normpath(part)
+                if part in names:
+                    sheets[sheet.get("name", "")] = hashlib.sha256(archive.read(part)).hexdigest()
+            shared = sha256_bytes(
+                *(archive.read(part) if part in names else b"" for part in SHARED_WORKBOOK_PARTS)
+            )
+            return sheets, shared
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        return {}, file_sha256(workbook_path)
+
+
+def sheet_fingerprint(
+    sheet_cfg: dict[str, Any],
+    section_headers: list[str],
+    sheet_digest: str,
+    shared_digest: str,
+    parser_digest: str,
+) -> str:
+    config = json.dumps([sheet_cfg, section_headers], sort_keys=True, ensure_ascii=False)
+    return sha256_bytes(
+        config.encode("utf-8"),
+        sheet_digest.encode("ascii"),
+        shared_digest.encode("ascii"),
+        parser_digest.encode("ascii"),
+    )
+
+
+def get_cache_path(config_path: Path, sheet_name: str) -> Path:
+    return PROCESSED_DIR / CACHE_DIR / config_path.stem / f"{sheet_name}.csv"
+
+
+def read_rows(path: Path) -> list[dict[str, Any]]:
+    with path.open(encoding="utf-8-sig", newline="") as handle:
+        return list(csv.DictReader(handle))
+
+
+def load_state(path: Path) -> dict[str, Any]:
+    if not path.exists():
+        return {}
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return {}
+    return state if state.get("version") == STATE_VERSION else {}
+
+
+def save_state(path: Path, state: dict[str, Any]) -> None:
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temp_path.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+def open_workbook(workbook_path: str) -> openpyxl.Workbook:
+    key = (workbook_path, os.stat(workbook_path).st_mtime_ns)
+    workbook = _WORKBOOKS.get(key)
+    if workbook is None:
+        _WORKBOOKS.clear()
+        workbook = openpyxl.load_workbook(workbook_path, data_only=True, read_only=True)
+        _WORKBOOKS[key] = workbook
+    return workbook
+
+
+def parse_sheet_task(
+    workbook_path: str,
+    sheet_cfg: dict[str, Any],
+    section_headers: list[str],
+    cache_path: str,
+) -> int:
+    """Parse one sheet in a worker process and write its rows to ``cache_path``."""
+    workbook = open_workbook(workbook_path)
+    rows_out = parse_group1.parse_sheet(workbook, sheet_cfg, set(section_headers))
+    parse_group1.write_rows(Path(cache_path), rows_out)
+    return len(rows_out)
+
+
+def merge_fingerprint() -> str:
+    outputs = [PROCESSED_DIR / name for name in build_gis_dataset.PROCESSED_FILES]
+    geojson_paths = [DATA_DIR / name for name in build_gis_dataset.GEOJSON_FILES.values()]
+    parts = [file_sha256(path) for path in [*outputs, *geojson_paths]]
+    parts.append(file_sha256(Path(build_gis_dataset.__file__)))
+    return sha256_bytes(*(part.encode("ascii") for part in parts))
+
+
+def run(config_paths: list[Path], workbook_path: Path, jobs: int | None, force: bool) -> None:
+    started = time.perf_counter()
+    state_path = PROCESSED_DIR / STATE_FILE
+    previous = {} if force else load_state(state_path)
+    previous_sheets: dict[str, dict[str, Any]] = previous.get("sheets", {})
+    parser_digest = file_sha256(Path(parse_group1.__file__))
+    sheet_digests, shared_digest = read_sheet_parts(workbook_path)
+    workbook_digest = "" if sheet_digests else shared_digest
+
+    configs = {path: parse_group1.read_config(path) for path in config_paths}
+    groups = {path.stem for path in config_paths}
+    sheets_state = {
+        key: value for key, value in previous_sheets.items() if key.split("/")[0] not in groups
+    }
+    pending: dict[str, tuple[Path, dict[str, Any], list[str], Path]] = {}
+    changed_groups: set[Path] = set()
+    for config_path, config in configs.items():
+        section_headers = sorted(parse_group1.read_section_headers(config))
+        output_path = ROOT.parent / config["output"]
+        if not output_path.exists():
+            changed_groups.add(config_path)
+        for sheet_cfg in config["sheets"]:
+            key = f"{config_path.stem}/{sheet_cfg['name']}"
+            cache_path = get_cache_path(config_path, sheet_cfg["name"])
+            fingerprint = sheet_fingerprint(
+                sheet_cfg,
+                section_headers,
+                sheet_digests.get(sheet_cfg["name"], workbook_digest),
+                shared_digest,
+                parser_digest,
+            )
+            sheets_state[key] = {"fingerprint": fingerprint}
+            cached = previous_sheets.get(key, {})
+            if cached.get("fingerprint") == fingerprint and cache_path.exists():
+                sheets_state[key]["rows"] = cached.get("rows", 0)
+                continue
+            pending[key] = (config_path, sheet_cfg, section_headers, cache_path)
+            changed_groups.add(config_path)
+
+    if pending:
+        print(f"Parsing {len(pending)} changed sheet(s) of {len(sheets_state)}")
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                key: executor.submit(
+                    parse_sheet_task,
+                    str(workbook_path),
+                    sheet_cfg,
+                    section_headers,
+                    str(cache_path),
+                )
+                for key, (_, sheet_cfg, section_headers, cache_path) in pending.items()
+            }
+            for key, future in futures.items():
+                sheets_state[key]["rows"] = future.result()
+                print(f"  {key}: {sheets_state[key]['rows']} rows")
+    else:
+        print(f"All {len(sheets_state)} sheets unchanged")
+
+    for config_path in config_paths:
+        if config_path not in changed_groups:
+            continue
+        config = configs[config_path]
+        rows_out: list[dict[str, Any]] = []
+        for sheet_cfg in config["sheets"]:
+            rows_out.extend(read_rows(get_cache_path(config_path, sheet_cfg["name"])))
+        output_path = ROOT.parent / config["output"]
+        parse_group1.write_rows(output_path, rows_out)
+        print(f"Wrote {len(rows_out)} rows to {output_path}")
+
+    merge_digest = merge_fingerprint()
+    dataset_path = PROCESSED_DIR / build_gis_dataset.OUTPUT_FILE
+    if force or merge_digest != previous.get("merge") or not dataset_path.exists():
+        build_gis_dataset.build_dataset(DATA_DIR)
+    else:
+        print(f"{dataset_path.name} is up to date")
+
+    save_state(
+        state_path,
+        {
+            "version": STATE_VERSION,
+            "workbook": str(workbook_path),
+            "sheets": sheets_state,
+            "merge": merge_digest,
+        },
+    )
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("configs", nargs="*", type=Path, help="group config files (default: all)")
+    parser.add_argument("--workbook", type=Path, default=ROOT.parent / parse_group1.DEFAULT_WORKBOOK)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="ignore the saved state and rebuild everything")
+    args = parser.parse_args()
+
+    config_paths = [path.resolve() for path in args.configs] or sorted(
+        SCRIPT_DIR.glob("group*_config.json"),
+        key=lambda path: int("".join(filter(str.isdigit, path.stem)) or 0),
+    )
+    if not args.workbook.exists():
+        sys.exit(f"Workbook not found: {args.workbook}")
+    run(config_paths, args.workbook, args.jobs, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Query-plan regression tests for the household indexes (migration 20251226_0009).
+
+The endpoints run against SQLite; the SQL they issue is captured and passed
+to EXPLAIN QUERY PLAN, so a change that stops a query from using its index
+fails here.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import deps, models
+from app.database import Base
+from app.main import app
+
+GEO_STATUS_INDEX = "ix_households_geo_status"
+ID_CARD_INDEX = "ix_households_id_card"
+
+
+@pytest.fixture()
+def database(tmp_path):
+    path = tmp_path / "households.db"
+    engine = create_engine(f"sqlite:///{path}")
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    Base.metadata.create_all(engine)
+    statements: list[tuple[str, tuple]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, tuple(parameters or ())))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    session_factory = sessionmaker(bind=engine)
+    async_session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+    with session_factory() as db:
+        user = models.User(
+            email="officer@example.com", full_name="Officer", hashed_password="x", role="admin"
+        )
+        db.add(user)
+        db.add_all(
+            models.Household(
+                household_code=f"HH-{number:04d}",
+                head_name=f"Head {number}",
+                id_card=f"{number:012d}",
+                province=f"Province {number % 3}",
+                district="District",
+                commune="Commune",
+                poverty_status="poor" if number % 2 else "near_poor",
+            )
+            for number in range(1, 61)
+        )
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+
+    def get_db():
+        with session_factory() as db:
+            yield db
+
+    async def get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[deps.get_db] = get_db
+    app.dependency_overrides[deps.get_async_db] = get_async_db
+    app.dependency_overrides[deps.get_current_user] = lambda: user
+    yield engine, statements
+    app.dependency_overrides.clear()
+    engine.dispose()
+
+
+def query_plans(engine, statements, marker: str) -> list[str]:
+    plans = []
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            if marker not in statement:
+                continue
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plans.append("\n".join(row[-1] for row in rows))
+    assert plans, f"no query touching {marker!r} was captured"
+    return plans
+
+
+def test_filtered_household_pages_use_geo_status_index(database):
+    engine, statements = database
+    client = TestClient(app)
+    params = {
+        "province": "Province 1",
+        "district": "District",
+        "commune": "Commune",
+        "status_filter": "poor",
+        "limit": 5,
+    }
+    first = client.get("/households", params=params)
+    assert first.status_code == 200
+    next_cursor = first.json()["next_cursor"]
+    assert next_cursor
+    assert client.get("/households", params={**params, "cursor": next_cursor}).status_code == 200
+
+    for plan in query_plans(engine, statements, "households.poverty_status ="):
+        assert GEO_STATUS_INDEX in plan
+        # The index ends in the rowid, so the (filters..., id) keyset order needs no sort.
+        assert "TEMP B-TREE" not in plan
+
+
+def test_id_card_lookups_use_id_card_index(database):
+    engine, statements = database
+    client = TestClient(app)
+    row = {
+        "name": "Nguyen Van A",
+        "id_num": "000000000007",
+        "family_mem": 4,
+        "b1_score": 10,
+        "b2_score": 20,
+        "classified_after_check": "nghèo",
+        "province": "Province 1",
+        "district": "District",
+        "commune": "Commune",
+        "village": "Village",
+        "date_check": "02/01/2024",
+        "official_check": "Officer",
+    }
+    response = client.post("/data-collections/commit", data=row)
+    assert response.status_code == 409
+
+    for plan in query_plans(engine, statements, "households.id_card ="):
+        assert ID_CARD_INDEX in plan